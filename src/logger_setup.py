@@ -1,6 +1,8 @@
 import os
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from queue import Queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 logger = logging.getLogger("logs")
 logger.setLevel(logging.INFO)
@@ -15,7 +17,58 @@ formatter = logging.Formatter(
 # Create a StreamHandler for terminal output
 stream_handler = logging.StreamHandler()
 stream_handler.setFormatter(formatter)
-logger.addHandler(stream_handler)
+
+# Output handlers are run by a QueueListener in a dedicated thread,
+# so threads that log never block on terminal or disk I/O (e.g. SD card stalls).
+_handlers = [stream_handler]
+_log_queue = Queue(-1)
+_queue_handler = QueueHandler(_log_queue)
+logger.addHandler(_queue_handler)
+_listener = QueueListener(_log_queue, *_handlers, respect_handler_level=True)
+_listener.start()
+
+def _restart_listener():
+    """
+    Restarts the QueueListener with the current output handlers.
+    """
+    global _listener
+    stop_logger()
+    _listener = QueueListener(_log_queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+
+def set_log_queue(log_queue):
+    """
+    Sets the log queue consumed by the QueueListener (output handlers), e.g. a multiprocessing.Queue shared with child processes.
+    To be called in the main process before starting the child processes.
+    Only the main process owns the output handlers (a log file is never rotated by more than one process).
+    """
+    global _log_queue
+    stop_logger()
+    _log_queue = log_queue
+    _queue_handler.queue = log_queue
+    _restart_listener()
+
+def setup_logger_child(log_queue):
+    """
+    Sets up the logger in a child process: log records are only put in the main process log queue (`set_log_queue`).
+    No output handlers or listener are kept in the child (forked children inherit them from the main process).
+    Pending records are flushed to the queue by multiprocessing when the child process exits.
+    """
+    global _log_queue, _listener
+    _log_queue = log_queue
+    _queue_handler.queue = log_queue
+    _handlers.clear()
+    _listener = QueueListener(log_queue) # Never started, so `stop_logger` is a no-op in the child
+
+def stop_logger():
+    """
+    Stops the QueueListener, flushing all pending log messages.
+    Should be called before exiting a process (it is registered at exit for the main process).
+    """
+    if _listener._thread is not None:
+        _listener.stop()
+
+atexit.register(stop_logger)
 
 def setup_logger_file(log_directory: str, max_size_mb: int, max_files: int):
     """
@@ -24,9 +77,10 @@ def setup_logger_file(log_directory: str, max_size_mb: int, max_files: int):
 
     # Create a FileHandler for file output
     file_handler = RotatingFileHandler(
-        os.path.join(log_directory, 'logs.log'), 
-        maxBytes=max_size_mb*1024*1024, 
+        os.path.join(log_directory, 'logs.log'),
+        maxBytes=max_size_mb*1024*1024,
         backupCount=max_files-1
         )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
\ No newline at end of file
+    _handlers.append(file_handler)
+    _restart_listener()
@@ -1,71 +1,101 @@
-from logger_setup import logger
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from logger_setup import set_log_queue, logger
 from modules.config import Config
-from modules.camera import CameraReader
-from modules.recording.stream_recording import StreamRecording
-from modules.recording.motion_recording import MotionRecording
+from modules.camera_process import CameraProcess
+from modules.recording.recording_manager import MAX_CONVERSION_WORKERS
 
-logger.info('Script Running.')
+if __name__ == '__main__':
+    logger.info('Script Running.')
 
-# Load Config from config file
-CONFIG = Config(config_file='config.yaml')
+    # Load Config from config file
+    CONFIG = Config(config_file='config.yaml')
 
-# Set StreamRecording Sub-Class Config
-StreamRecording.setClassConfig(
-    enabled=CONFIG.recordings['save'],
-    output_dir=CONFIG.recordings.get('directory', None),
-    max_days_to_save=CONFIG.recordings.get('max_days_to_save', None),
-    encode_to_h264=CONFIG.recordings.get('encode_to_h264', None),
-    h264_encoder=CONFIG.recordings.get('h264_encoder', None),
-    bitrate=CONFIG.recordings.get('bitrate', None)
-)
+    # Logs of all camera processes are written by the main process (single log file writer)
+    log_queue = multiprocessing.Queue(-1)
+    set_log_queue(log_queue)
 
-# Set MotionRecording Sub-Class Config
-MotionRecording.setClassConfig(
-    enabled=True, # True because this instance is only create 9if motion for the respective camera is enabled.
-    output_dir=CONFIG.motion.get('directory', None),
-    max_days_to_save=CONFIG.motion.get('max_days_to_save', None),
-    encode_to_h264=CONFIG.motion.get('encode_to_h264', None),
-    h264_encoder=CONFIG.motion.get('h264_encoder', None),
-    bitrate=CONFIG.motion.get('bitrate', None)
-)
+    # Shared configs for camera processes (StreamRecording and MotionRecording Sub-Class Configs)
+    recordings_cfg = dict(CONFIG.recordings)
+    motion_cfg = {k: CONFIG.motion[k] for k in ['directory', 'max_days_to_save', 'encode_to_h264', 'h264_encoder', 'bitrate'] if k in CONFIG.motion}
 
-# Initialize Cameras from Config
-CAMERAS = {}
-for cam_id, cam_cfg in CONFIG.cameras.items():
-    try:
-        CAMERA = CameraReader(
-            camera_name=cam_cfg['name'],
-            camera_name_norm=cam_cfg['normalized_name'],
-            camera=cam_cfg['camera'],
-            target_fps=cam_cfg['target_fps'],
-            port=cam_cfg['port'],
-            stream_quality=cam_cfg['stream_quality'],
-            show_fps=cam_cfg['show_fps'],
-            source_format=cam_cfg.get('source_format', None),
-            width=cam_cfg.get('width', None),
-            height=cam_cfg.get('height', None),
-            source_fps=cam_cfg.get('source_fps', None),
-            motion_enabled=CONFIG.motion.get(cam_id, {}).get('enabled', False),
-            noise_level=CONFIG.motion.get(cam_id, {}).get('noise_level', None),
-            pixel_threshold_pct=CONFIG.motion.get(cam_id, {}).get('pixel_threshold', None),
-            object_threshold_pct=CONFIG.motion.get(cam_id, {}).get('object_threshold', None),
-            minimum_motion_frames=CONFIG.motion.get(cam_id, {}).get('minimum_motion_frames', None),
-            pre_capture=CONFIG.motion.get(cam_id, {}).get('pre_capture', None),
-            post_capture=CONFIG.motion.get(cam_id, {}).get('post_capture', None),
-            event_gap=CONFIG.motion.get(cam_id, {}).get('event_gap', None)
-        )
-        CAMERA.start() # Start camera thread
-        CAMERAS[cam_id] = CAMERA
-    except Exception as e:
-        logger.error(f"{e}")
+    # h264 conversions locks shared by all camera processes (conversion slots, single VAAPI encode)
+    conversion_locks = (multiprocessing.BoundedSemaphore(MAX_CONVERSION_WORKERS), multiprocessing.Semaphore(1))
 
-# Run the main loop to keep the script alive
-while True:
-    # Close all cameras if 'exit' is input
-    command = input()
-    if command=='exit' or command=='q':
-        logger.info("Manually closing all cameras.")
-        for cam_id, cam in CAMERAS.items():
-            cam.stop()
-        break
+    # Initialize Cameras from Config (one process per camera)
+    CAMERAS = {}
+    for cam_id, cam_cfg in CONFIG.cameras.items():
+        try:
+            camera_kwargs = dict(
+                camera_name=cam_cfg['name'],
+                camera_name_norm=cam_cfg['normalized_name'],
+                camera=cam_cfg['camera'],
+                target_fps=cam_cfg['target_fps'],
+                port=cam_cfg['port'],
+                stream_quality=cam_cfg['stream_quality'],
+                stream_subsample=cam_cfg.get('stream_subsample', 420),
+                show_fps=cam_cfg['show_fps'],
+                source_format=cam_cfg.get('source_format', None),
+                width=cam_cfg.get('width', None),
+                height=cam_cfg.get('height', None),
+                source_fps=cam_cfg.get('source_fps', None),
+                motion_enabled=CONFIG.motion.get(cam_id, {}).get('enabled', False),
+                noise_level=CONFIG.motion.get(cam_id, {}).get('noise_level', None),
+                pixel_threshold_pct=CONFIG.motion.get(cam_id, {}).get('pixel_threshold', None),
+                object_threshold_pct=CONFIG.motion.get(cam_id, {}).get('object_threshold', None),
+                minimum_motion_frames=CONFIG.motion.get(cam_id, {}).get('minimum_motion_frames', None),
+                pre_capture=CONFIG.motion.get(cam_id, {}).get('pre_capture', None),
+                post_capture=CONFIG.motion.get(cam_id, {}).get('post_capture', None),
+                event_gap=CONFIG.motion.get(cam_id, {}).get('event_gap', None)
+            )
+            CAMERA = CameraProcess(
+                camera_name=cam_cfg['name'],
+                camera_kwargs=camera_kwargs,
+                recordings_cfg=recordings_cfg,
+                motion_cfg=motion_cfg,
+                log_queue=log_queue,
+                cpu_affinity=cam_cfg.get('cpu_affinity', None),
+                niceness=cam_cfg.get('niceness', None),
+                conversion_locks=conversion_locks
+            )
+            CAMERA.start() # Start camera process
+            CAMERAS[cam_id] = CAMERA
+        except Exception as e:
+            logger.error(f"{e}")
 
+    # Shutdown event, set by 'exit'/'q' input or by SIGINT/SIGTERM
+    SHUTDOWN_EVENT = threading.Event()
+
+    def _signal_handler(signum, frame):
+        logger.info(f"Received signal {signal.Signals(signum).name}.")
+        SHUTDOWN_EVENT.set()
+
+    signal.signal(signal.SIGINT, _signal_handler)
+    signal.signal(signal.SIGTERM, _signal_handler)
+
+    def _input_loop():
+        """
+        To be ran in a separate thread.
+        Sets shutdown event if 'exit' or 'q' is input.
+        """
+        while not SHUTDOWN_EVENT.is_set():
+            try:
+                command = input()
+            except EOFError:
+                return
+            if command=='exit' or command=='q':
+                SHUTDOWN_EVENT.set()
+
+    threading.Thread(target=_input_loop, daemon=True).start()
+
+    # Keep the script alive until shutdown
+    while not SHUTDOWN_EVENT.wait(timeout=1):
+        pass
+
+    # Close all cameras concurrently
+    logger.info("Closing all cameras.")
+    if CAMERAS:
+        with ThreadPoolExecutor(max_workers=len(CAMERAS)) as executor:
+            list(executor.map(lambda cam: cam.stop(), CAMERAS.values()))
@@ -1,12 +1,73 @@
 import cv2
 import time
+import logging
+import numpy as np
 import threading
-from queue import Queue, Empty
+from collections import deque
 from modules.stream import StreamServer
 from modules.recording.stream_recording import StreamRecording
 from modules.motion import Motion
 from logger_setup import logger
-from utils import convert_time_to_datetime
+from utils import convert_time_to_datetime, open_video_capture, fourcc_to_str
+
+# Optional libjpeg-turbo JPEG encoder (SIMD), falls back to OpenCV imencode if not available
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_444, TJSAMP_422, TJSAMP_420, TJSAMP_GRAY
+    TURBO_JPEG = TurboJPEG()
+    TURBO_JPEG_SUBSAMPLE = {444: TJSAMP_444, 422: TJSAMP_422, 420: TJSAMP_420, 'gray': TJSAMP_GRAY}
+except Exception:
+    TURBO_JPEG = None
+
+# OpenCV JPEG chroma subsampling factors (grayscale is encoded from a grayscale frame)
+CV2_JPEG_SUBSAMPLE = {
+    444: cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+    422: cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+    420: cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+}
+
+# Optional NVIDIA nvJPEG encoder (GPU / Jetson hardware JPEG encoder), preferred when a CUDA device is present
+try:
+    from nvjpeg import NvJpeg
+except Exception:
+    NvJpeg = None
+
+# Adaptive JPEG quality: lowered by JPEG_QUALITY_STEP (down to MIN_JPEG_QUALITY) while the average encode time exceeds the frame interval,
+# raised back by 1 (up to `stream_quality`) while it is below half the frame interval. Adjusted at most once per second.
+MIN_JPEG_QUALITY = 40
+JPEG_QUALITY_STEP = 5
+
+# Frame info text style: bright green with black shadow for vigilance style
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.6
+THICKNESS = 2
+TEXT_COLOR = (0, 255, 0) # bright green
+SHADOW_COLOR = (0, 0, 0) # black shadow
+LINE_TYPE = cv2.LINE_AA
+
+def _draw_text_with_shadow(img: bytes, text: str, pos: tuple):
+    """
+    Draws text with a black shadow (offset by 1 px right and down) for better visibility.
+    """
+    x, y = pos
+    putText = cv2.putText
+    putText(img, text, (x+1, y+1), FONT, FONT_SCALE, SHADOW_COLOR, THICKNESS, LINE_TYPE)
+    putText(img, text, (x, y), FONT, FONT_SCALE, TEXT_COLOR, THICKNESS, LINE_TYPE)
+
+def _render_text_sprite(text: str):
+    """
+    Pre-renders text with shadow into a small BGR sprite and its boolean mask.
+    Returns (sprite, mask, text_w, text_h, pad), to be pasted on frames by ROI copy.
+    """
+    (text_w, text_h), baseline = cv2.getTextSize(text, FONT, FONT_SCALE, THICKNESS)
+    pad = THICKNESS
+    sprite_h, sprite_w = text_h + baseline + 2 * pad + 1, text_w + 2 * pad + 1
+    sprite = np.zeros((sprite_h, sprite_w, 3), dtype=np.uint8)
+    mask = np.zeros((sprite_h, sprite_w), dtype=np.uint8)
+    org = (pad, pad + text_h)
+    _draw_text_with_shadow(sprite, text, org)
+    cv2.putText(mask, text, (org[0]+1, org[1]+1), FONT, FONT_SCALE, 255, THICKNESS, LINE_TYPE)
+    cv2.putText(mask, text, org, FONT, FONT_SCALE, 255, THICKNESS, LINE_TYPE)
+    return sprite, mask.astype(bool)[:, :, None], text_w, text_h, pad
 
 class CameraReader:
     """
@@ -18,7 +79,7 @@ class CameraReader:
     """
 
     def __init__(self, camera_name: str, camera_name_norm: str, camera: str, 
-                 target_fps: int, port: int, stream_quality: int, show_fps: bool, 
+                 target_fps: int, port: int, stream_quality: int, show_fps: bool, stream_subsample: int | str = 420,
                  source_format: str = None, width: int = None, height: int = None, 
                  source_fps: int = None, motion_enabled: bool = None,
                  noise_level: int = None, pixel_threshold_pct: float = None,
@@ -31,6 +92,41 @@ class CameraReader:
         self.target_fps = target_fps
         self.show_fps = show_fps
         self.stream_quality = stream_quality
+        self.stream_subsample = stream_subsample
+
+        # nvJPEG encoder, initialized in frame dispatcher thread (if available)
+        self._nvjpeg = None
+
+        # JPEG encoding params, built once (no huffman optimization pass, to reduce encoding time)
+        self._jpeg_params = np.array([cv2.IMWRITE_JPEG_QUALITY, stream_quality, cv2.IMWRITE_JPEG_OPTIMIZE, 0]
+                                     + ([cv2.IMWRITE_JPEG_SAMPLING_FACTOR, CV2_JPEG_SUBSAMPLE[stream_subsample]] if stream_subsample in CV2_JPEG_SUBSAMPLE else []),
+                                     dtype=np.int32)
+        self._turbo_jpeg_subsample = TURBO_JPEG_SUBSAMPLE[stream_subsample] if TURBO_JPEG is not None else None
+
+        # Adaptive JPEG quality (see `_adapt_jpeg_quality`)
+        self._jpeg_quality = stream_quality
+        self._frame_interval = 1.0 / target_fps
+        self._encode_time = None # Exponential moving average of encode time (seconds)
+        self._quality_adjust_sec = None
+
+        # Frame info text sizes (Hershey digits have constant width, so date and time sizes are stable)
+        (self._name_w, self._name_h), _ = cv2.getTextSize(camera_name, FONT, FONT_SCALE, THICKNESS)
+        (self._date_w, self._date_h), _ = cv2.getTextSize('00-00-0000', FONT, FONT_SCALE, THICKNESS)
+        (self._time_w, self._time_h), self._time_baseline = cv2.getTextSize('00:00:00.000', FONT, FONT_SCALE, THICKNESS)
+        (self._ms_w, _), _ = cv2.getTextSize('000', FONT, FONT_SCALE, THICKNESS)
+        self._time_prefix_w = self._time_w - self._ms_w # advance of `HH:MM:SS.`, where the milliseconds are drawn
+
+        # Frame info geometry, set on first frame (see `_set_overlay_geometry`)
+        self._overlay_shape = None
+
+        # Frame info date and time strings (up to seconds), updated once per second
+        self._overlay_sec = None
+        self._date_str = None
+        self._time_prefix_str = None
+
+        # Pre-rendered text sprites cache for texts that rarely change (camera name, date, time up to seconds, fps)
+        self._sprite_cache = {}
+        self._max_sprite_cache_size = 64
 
         # Camera Thread
         self._camera_thread = threading.Thread(
@@ -40,11 +136,11 @@ class CameraReader:
         self._camera_stop_event = threading.Event()
 
         # Initialize camera capture
-        self.cap = cv2.VideoCapture(camera)
+        self.cap = open_video_capture(camera)
         if not self.cap.isOpened():
             raise(f"Could not open camera '{camera_name}'({camera}).")
         else:
-            logger.info(f"Camera '{camera_name}' opened successfully.")
+            logger.info(f"Camera '{camera_name}' opened successfully (JPEG encoder: {'TurboJPEG' if TURBO_JPEG else 'OpenCV'}).")
         if source_format:
             self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*source_format))
         if width:
@@ -56,15 +152,17 @@ class CameraReader:
         
         # Initialize raw frames queue 
         max_frame_queue_size = 10  # Allow some buffer for frames (lower this if RAM usage is too high) (raw frames are heavy)
-        self.frame_queue = Queue(maxsize=max_frame_queue_size)
+        self.frame_queue = deque(maxlen=max_frame_queue_size) # Single producer/consumer (append/popleft are atomic, no lock needed)
+        self._frame_ready = threading.Event() # Set by camera thread when a frame is appended
+
+        # Pool of reusable raw frame buffers (returned by frame dispatcher after use), to avoid a new allocation per frame
+        self._frame_pool = deque()
 
         # Frame dispatcher Thread
         self._frame_dispatcher_thread = threading.Thread(
             target=self._frame_dispatcher,
             daemon=True
         )
-        self._frame_dispatcher_stop_event = threading.Event()
-
 
         # Initialize StreamServer Class Module
         self.stream_server = StreamServer(
@@ -112,7 +210,9 @@ class CameraReader:
         """
         self._camera_stop_event.set()
         self._camera_thread.join()
-        self._frame_dispatcher_stop_event.set()
+        self._clear_queue()
+        self.frame_queue.append(None) # Sentinel to stop frame dispatcher thread (camera thread is stopped, so it is never dropped)
+        self._frame_ready.set()
         self._frame_dispatcher_thread.join()
         self.stream_recording_manager.stop() # Stop recording manager thread
         self.motion.stop() # Stop motion process
@@ -130,169 +230,333 @@ class CameraReader:
     def _run(self):
         """
         To be ran in a separate thread.
-        Reads all frames from the camera, but only feeds the targeted frames to the processing and stream modules (respective queues).
+        Grabs all frames from the camera, but only decodes (retrieves) and feeds the targeted frames to the processing and stream modules (respective queues).
         Starts Stream Thread and Motion Process.
-        Uses time-based throttling.
-        """
-        # Get camera actual info
-        actual_fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
-        actual_fmt = "".join([chr((actual_fourcc >> 8 * i) & 0xFF) for i in range(4)])
-        source_fps = int(self.cap.get(cv2.CAP_PROP_FPS))
-        logger.info(f"Starting camera '{self.camera_name}' frame reader thread. \
-(Source_Format: {actual_fmt}, Source_FPS: {source_fps}, \
-Target_FPS: {self.target_fps}, Width: {int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))}, \
-Height: {int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))})")
-
-        # Compute sleep time based on source FPS
-        if source_fps and source_fps >= 1:
-            sleep_time = 1 / source_fps / 2  # Sleep half the time to allow for processing
-        else:
-            sleep_time = 0.005 # Sleep 5ms (default) to prevent high CPU usage (for 30 fps camera new frames are available every ~33ms)
-        
-        # fps computation variables
+        Uses time-based throttling. `cap.grab()` blocks until a new frame is available, so no sleep is needed.
+        """
+        # Get camera actual info (only queried if it is going to be logged)
+        if logger.isEnabledFor(logging.INFO):
+            actual_fmt = fourcc_to_str(self.cap.get(cv2.CAP_PROP_FOURCC))
+            logger.info("Starting camera '%s' frame reader thread. "
+                        "(Source_Format: %s, Source_FPS: %d, Target_FPS: %d, Width: %d, Height: %d)",
+                        self.camera_name, actual_fmt, int(self.cap.get(cv2.CAP_PROP_FPS)), self.target_fps,
+                        int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+        # Camera Thread Loop, specialized once on whether fps has to be computed (no per frame branch)
         if self.show_fps:
-            throttle_frame_count = 0
-            throttle_start_time = time.time()
-            current_fps = 0.0
+            self._capture_loop_with_fps()
+        else:
+            self._capture_loop()
+
+        # Close camera and release resources
+        self._close_camera_reader()
+    
+    def _retrieve(self):
+        """
+        Decodes the grabbed frame (always decoded in BGR, independent from source format),
+        into a free buffer from the frame pool if any. Returns (ret, frame).
+        """
+        try:
+            frame_buf = self._frame_pool.pop() # Reuse a free buffer, if any
+        except IndexError:
+            frame_buf = None # Let OpenCV allocate a new one
+        return self.cap.retrieve(frame_buf)
+
+    def _capture_loop(self):
+        """
+        Camera thread loop (without fps computation).
+        Grabs every frame and retrieves the targeted frames using time-based throttling
+        (monotonic clock in ns, immune to wall clock jumps).
+        """
+        # Hoist hot attributes to locals
+        grab, retrieve, write = self.cap.grab, self._retrieve, self._write
+        monotonic_ns, wall_time = time.monotonic_ns, time.time
+        stop_is_set = self._camera_stop_event.is_set
 
         # Time-based throttling control variable
-        target_frame_interval = 1.0 / self.target_fps
-        next_display_time = time.time()
-
-        # Camera Thread Loop
-        while not self._camera_stop_event.is_set():
-            # Read frame from camera (always read in BGR, independent from source format)
-            ret, frame = self.cap.read()
-            if not ret:
-                logger.error(f"Camera '{self.camera_name}' read failed.")
+        target_frame_interval = int(1e9 / self.target_fps)
+        next_display_time = monotonic_ns()
+
+        while not stop_is_set():
+            # Grab frame from camera (no decoding, blocks until a new frame is available)
+            if not grab():
+                logger.error("Camera '%s' read failed.", self.camera_name)
                 self.stop()
                 break
-            now = time.time()
             
             # Time-based throttling
-            if now >= next_display_time:
+            if monotonic_ns() >= next_display_time:
+                next_display_time += target_frame_interval
+                ret, frame = retrieve()
+                if ret:
+                    # Write raw frame and wall clock frame time (for frame info and recordings) to frame queue
+                    write((frame, wall_time(), None))
+
+    def _capture_loop_with_fps(self):
+        """
+        Camera thread loop (with fps computation, for `show_fps`).
+        Same as `_capture_loop`, also computing the throttled fps every second.
+        """
+        # Hoist hot attributes to locals
+        grab, retrieve, write = self.cap.grab, self._retrieve, self._write
+        monotonic_ns, wall_time = time.monotonic_ns, time.time
+        stop_is_set = self._camera_stop_event.is_set
 
-                # Update Time-based throttling control variable for next iterations
+        # fps computation variables
+        throttle_frame_count = 0
+        throttle_start_time = monotonic_ns()
+        current_fps = 0.0
+
+        # Time-based throttling control variable
+        target_frame_interval = int(1e9 / self.target_fps)
+        next_display_time = monotonic_ns()
+
+        while not stop_is_set():
+            # Grab frame from camera (no decoding, blocks until a new frame is available)
+            if not grab():
+                logger.error("Camera '%s' read failed.", self.camera_name)
+                self.stop()
+                break
+            mono_now = monotonic_ns()
+            
+            # Time-based throttling
+            if mono_now >= next_display_time:
                 next_display_time += target_frame_interval
-                
+                ret, frame = retrieve()
+                if not ret:
+                    continue
+
                 # Compute fps
-                if self.show_fps:
-                    throttle_frame_count += 1
-                    elapsed = now - throttle_start_time
-                    if elapsed >= 1:
-                        current_fps = throttle_frame_count / elapsed
-                        throttle_frame_count = 0
-                        throttle_start_time = now
-                else:
-                    current_fps = None
-
-                # Write raw frame to frame queue
-                self._write((frame, now, current_fps))
-            
-            time.sleep(sleep_time)  # Sleep to reduce CPU usage
+                throttle_frame_count += 1
+                elapsed = mono_now - throttle_start_time
+                if elapsed >= 1_000_000_000:
+                    current_fps = throttle_frame_count * 1e9 / elapsed
+                    throttle_frame_count = 0
+                    throttle_start_time = mono_now
+
+                # Write raw frame and wall clock frame time (for frame info and recordings) to frame queue
+                write((frame, wall_time(), current_fps))
 
-        # Close camera and release resources
-        self._close_camera_reader()
-    
     def _write(self, frame: bytes):
         """
         Writes a raw frame to the frame queue.
-        If the queue is full, the frame is dropped.
+        If the queue is full, the oldest frame is dropped to make room for the new one,
+        so the frame dispatcher always works on the freshest frames (no latency build up in spike scenarios).
+        Drawing and encoding run in the frame dispatcher thread, keeping the camera thread capture-only.
         """
-        try:
-            self.frame_queue.put_nowait(frame)
-        except:
-            pass  # Drop frame if queue is full 
-                    # (Might be a good idea to relpace frame by oldest instead of dropping it, 
-                    # should reduce latency build up in spike scenarios)
+        frame_queue = self.frame_queue
+        if len(frame_queue) == frame_queue.maxlen:
+            try:
+                old_frame, _, _ = frame_queue.popleft() # Drop oldest frame
+                self._frame_pool.append(old_frame) # Return its buffer to the pool
+            except IndexError:
+                pass # Frame dispatcher emptied the queue meanwhile
+        frame_queue.append(frame) # Drops oldest frame itself if still full
+        self._frame_ready.set()
     
     def _frame_dispatcher(self):
         """
-        Seperate thread loop to read raw frame from queue and encoding it to jpeg.
+        Seperate thread loop to read raw frame from queue and encoding it to jpeg, until the stop sentinel (None) is received.
         It will then serve encoded frame to Stream Class Module and StreamRecording Sub-Class Module.
-        It will serve a tuple (raw, encoded) frames to Motion Class Module.
+        It will serve a tuple (raw, encoded) frames to Motion Class Module, if motion is enabled.
+        Raw frame buffers are returned to the frame pool after being encoded.
+        If neither recording nor motion is enabled, frames are only drawn and encoded while a stream client is connected.
         """
-        while not self._frame_dispatcher_stop_event.is_set():
-            try:
-                frame, now, current_fps = self.frame_queue.get(timeout=1)
-            except Empty:
-                continue # avoid blocks when exiting
-            if frame is None:
+        # Resolved once, so no raw frame references are handed to a disabled Motion module
+        motion_write = self.motion.write if self.motion.enabled else None
+        always_encode = self.stream_recording_manager.enabled or motion_write is not None
+        stream_server = self.stream_server
+        skipping = False
+
+        # nvJPEG encoder is created in this thread, as it is the only one encoding (nvJPEG state is per context)
+        self._nvjpeg = self._init_nvjpeg()
+
+        frame_queue = self.frame_queue
+        frame_ready = self._frame_ready
+        perf_counter = time.perf_counter
+        while True:
+            # Wait until a frame (or the stop sentinel) is available, then handle all queued frames
+            if not frame_queue:
+                frame_ready.wait()
+                frame_ready.clear() # Cleared before draining, so a frame appended meanwhile sets it again
+                continue
+            item = frame_queue.popleft()
+            if item is None:
+                break # Stop sentinel
+            frame, now, current_fps = item
+
+            # Skip encoding while nothing needs the encoded frame (stream latest frame is dropped once, so it is never served stale)
+            if not always_encode and not stream_server.client_count:
+                if not skipping:
+                    skipping = True
+                    stream_server.clear()
+                self._frame_pool.append(frame)
                 continue
+            skipping = False
             
-            # Draw info on raw frame
-            draw_frame = self._draw_frame_info(frame, now, current_fps)
+            # Copy unannotated raw frame for Motion, if enabled (frame buffer is reused after this iteration)
+            motion_frame = frame.copy() if motion_write is not None else None
+
+            # Draw info on frame (in place)
+            self._draw_frame_info(frame, now, current_fps)
             
-            # Encode frame as JPEG
-            ret, jpeg = cv2.imencode('.jpg', draw_frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.stream_quality])
-            if not ret:
-                continue
+            # Encode frame as JPEG bytes (JPEG quality is adapted to the encode time)
+            encode_start = perf_counter()
+            jpeg_bytes = self._encode_jpeg(frame)
+            self._adapt_jpeg_quality(perf_counter() - encode_start, now)
 
-            # JPEG NumPy array to bytes
-            jpeg_bytes = jpeg.tobytes()
+            # Return frame buffer to the pool
+            self._frame_pool.append(frame)
+            if jpeg_bytes is None:
+                continue
 
             # Feed Encoded frame to Stream
-            self.stream_server.write(jpeg_bytes)
+            stream_server.write(jpeg_bytes)
 
             # Feed Encoded frame to StreamRecording
             self.stream_recording_manager.write(jpeg_bytes)
 
-            # Feed Raw and Encoded frame and frame time to Motion
-            self.motion.write(frame, jpeg_bytes, now)
+            # Feed Raw and Encoded frame and frame time to Motion, if enabled
+            if motion_write is not None:
+                motion_write(motion_frame, jpeg_bytes, now)
     
+    def _init_nvjpeg(self):
+        """
+        Returns a nvJPEG encoder if nvjpeg is installed and a CUDA device is present, otherwise None.
+        """
+        if NvJpeg is None:
+            return None
+        try:
+            nvjpeg = NvJpeg()
+            logger.info(f"Camera '{self.camera_name}' using nvJPEG (GPU) JPEG encoder.")
+            return nvjpeg
+        except Exception as e:
+            logger.warning(f"Camera '{self.camera_name}' could not initialize nvJPEG encoder, using CPU encoder: {e}")
+            return None
+
+    def _encode_jpeg(self, frame: bytes):
+        """
+        Encodes a BGR frame to JPEG bytes, with nvJPEG (GPU) or TurboJPEG if available, otherwise with OpenCV.
+        Uses the configured chroma subsampling (nvJPEG uses its default).
+        OpenCV output is returned as a 1-D memoryview of the (new, never reused) encoded array, avoiding a `tobytes()` copy.
+        Returns None if encoding fails.
+        """
+        if self._nvjpeg is not None:
+            return self._nvjpeg.encode(frame, self._jpeg_quality)
+        if TURBO_JPEG is not None:
+            return TURBO_JPEG.encode(frame, quality=self._jpeg_quality, pixel_format=TJPF_BGR, jpeg_subsample=self._turbo_jpeg_subsample)
+        if self.stream_subsample == 'gray':
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        ret, jpeg = cv2.imencode('.jpg', frame, self._jpeg_params)
+        if not ret:
+            return None
+        return jpeg.reshape(-1).data
+
+    def _adapt_jpeg_quality(self, encode_time: float, now: float):
+        """
+        Updates the average encode time and adapts the JPEG quality at most once per second:
+        lowers it while encoding can not keep up with the target fps, and restores it towards `stream_quality` when it can.
+        """
+        avg = self._encode_time = encode_time if self._encode_time is None else 0.9 * self._encode_time + 0.1 * encode_time
+        sec = int(now)
+        if sec == self._quality_adjust_sec:
+            return
+        self._quality_adjust_sec = sec
+        quality = self._jpeg_quality
+        if avg > self._frame_interval and quality > MIN_JPEG_QUALITY:
+            quality = max(quality - JPEG_QUALITY_STEP, MIN_JPEG_QUALITY)
+        elif avg < self._frame_interval / 2 and quality < self.stream_quality:
+            quality += 1
+        else:
+            return
+        if quality < self._jpeg_quality:
+            logger.warning("Camera '%s': JPEG encoding not keeping up (%.1f ms per frame), lowering quality to %d.",
+                           self.camera_name, avg * 1000, quality)
+        self._jpeg_quality = quality
+        self._jpeg_params[1] = quality
+
     def _clear_queue(self):
         """
         Clears queue.
         """
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except Exception:
-                break
+        self.frame_queue.clear()
 
     def _draw_frame_info(self, frame: bytes, now: float, fps: float = None):
         """
         Draws the date and time (with milliseconds) in the bottom-right corner,
         and the camera name in the top-left corner, styled like a vigilance system.
         Draws fps in top-right corner, if given.
+        Draws in place (the given frame is modified and returned).
         """
-        frame = frame.copy()
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        font_scale = 0.6
-        thickness = 2
-        
-        # Colors: bright green with black shadow for vigilance style
-        text_color = (0, 255, 0)  # bright green
-        shadow_color = (0, 0, 0)  # black shadow
+        # Get Date and Time (up to seconds) strings, only computed when the second changes
+        sec = int(now)
+        if sec != self._overlay_sec:
+            self._overlay_sec = sec
+            self._date_str, time_str = convert_time_to_datetime(now)
+            self._time_prefix_str = time_str[:-3] # `HH:MM:SS.`
+        ms_str = f"{int((now - sec) * 1000):03d}"
         
-        # Get Date and Time strings
-        date_str, time_str = convert_time_to_datetime(now)
-        
-        # Get text sizes
-        (date_w, date_h), _ = cv2.getTextSize(date_str, font, font_scale, thickness)
-        (time_w, time_h), _ = cv2.getTextSize(time_str, font, font_scale, thickness)
-        (name_w, name_h), _ = cv2.getTextSize(self.camera_name, font, font_scale, thickness)
-        
-        h, w = frame.shape[:2]
-        
-        # Draw shadow for better visibility
-        def draw_text_with_shadow(img: bytes, text: str, pos: int):
-            x, y = pos
-            # shadow offset by 1 px right and down
-            cv2.putText(img, text, (x+1, y+1), font, font_scale, shadow_color, thickness, cv2.LINE_AA)
-            cv2.putText(img, text, (x, y), font, font_scale, text_color, thickness, cv2.LINE_AA)
+        # Overlay geometry is invariant for a given frame size, so it is only computed once
+        shape = frame.shape
+        if shape != self._overlay_shape:
+            self._set_overlay_geometry(shape[0], shape[1])
         
         # Bottom-right corner for date and time
-        draw_text_with_shadow(frame, date_str, (w - date_w - 10, h - time_h * 2 - 10))
-        draw_text_with_shadow(frame, time_str, (w - time_w - 10, h - 10))
+        # Time `HH:MM:SS.` changes once per second, so it is cached. Only the milliseconds are drawn every frame.
+        self._draw_cached_text(frame, self._date_str, self._date_pos)
+        self._draw_cached_text(frame, self._time_prefix_str, self._time_pos)
+        # Milliseconds are drawn on a small ROI view around them (cache friendly), not on the full frame
+        x0, y0, x1, y1 = self._ms_roi
+        _draw_text_with_shadow(frame[y0:y1, x0:x1], ms_str, self._ms_roi_pos)
         
         # Top-left corner for camera name
-        draw_text_with_shadow(frame, self.camera_name, (10, name_h + 10))
+        self._draw_cached_text(frame, self.camera_name, self._name_pos)
 
         # Top-right corner for FPS
         if fps:
             fps_str = f"{fps:.2f} fps"
-            (fps_w, fps_h), _ = cv2.getTextSize(fps_str, font, font_scale, thickness)
-            draw_text_with_shadow(frame, fps_str, (w - fps_w - 10, fps_h + 10))
+            _, _, fps_w, fps_h, _ = self._get_text_sprite(fps_str)
+            self._draw_cached_text(frame, fps_str, (self._overlay_shape[1] - fps_w - 10, fps_h + 10))
         
-        return frame
\ No newline at end of file
+        return frame
+
+    def _set_overlay_geometry(self, h: int, w: int):
+        """
+        Computes the frame info text positions for the given frame size.
+        """
+        self._overlay_shape = (h, w, 3)
+        self._date_pos = (w - self._date_w - 10, h - self._time_h * 2 - 10)
+        self._time_pos = (w - self._time_w - 10, h - 10)
+        self._name_pos = (10, self._name_h + 10)
+        ms_x, ms_y = self._time_pos[0] + self._time_prefix_w, h - 10
+        x0, y0 = max(ms_x - THICKNESS, 0), max(ms_y - self._time_h - THICKNESS, 0)
+        x1, y1 = ms_x + self._ms_w + THICKNESS + 1, ms_y + self._time_baseline + THICKNESS + 1
+        self._ms_roi = (x0, y0, x1, y1)
+        self._ms_roi_pos = (ms_x - x0, ms_y - y0)
+
+    def _get_text_sprite(self, text: str):
+        """
+        Returns the pre-rendered sprite of the given text, rendering and caching it if needed.
+        Cache is cleared when full (fps strings keep changing).
+        """
+        entry = self._sprite_cache.get(text)
+        if entry is None:
+            if len(self._sprite_cache) >= self._max_sprite_cache_size:
+                self._sprite_cache.clear()
+            entry = _render_text_sprite(text)
+            self._sprite_cache[text] = entry
+        return entry
+
+    def _draw_cached_text(self, frame: bytes, text: str, pos: tuple):
+        """
+        Pastes the pre-rendered text sprite on the frame at the given text origin, by masked ROI copy.
+        Falls back to drawing the text if the sprite does not fit inside the frame.
+        """
+        sprite, mask, _, text_h, pad = self._get_text_sprite(text)
+        x0, y0 = pos[0] - pad, pos[1] - text_h - pad
+        sprite_h, sprite_w = sprite.shape[:2]
+        h, w = frame.shape[:2]
+        if x0 < 0 or y0 < 0 or x0 + sprite_w > w or y0 + sprite_h > h:
+            _draw_text_with_shadow(frame, text, pos)
+            return
+        np.copyto(frame[y0:y0 + sprite_h, x0:x0 + sprite_w], sprite, where=mask)
\ No newline at end of file
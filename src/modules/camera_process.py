@@ -0,0 +1,123 @@
+import os
+import signal
+import multiprocessing
+from modules.camera import CameraReader
+from modules.recording.recording_manager import RecordingManager
+from modules.recording.stream_recording import StreamRecording
+from modules.recording.motion_recording import MotionRecording
+from logger_setup import setup_logger_child, logger
+
+# Max time (seconds) to wait for a camera process to stop before terminating it,
+# long enough for its running and queued h264 conversions (e.g. of the last hour file) to finish
+CAMERA_STOP_TIMEOUT = 600
+
+class CameraProcess:
+    """
+    Camera Process Class.
+    Runs a CameraReader (and its Stream, Recording and Motion modules) in its own Process (Multiprocessing),
+    so that the Python work of each camera is not serialized with the other cameras by the GIL.
+    Threads inside each camera process are kept as they are.
+    """
+
+    def __init__(self, camera_name: str, camera_kwargs: dict, recordings_cfg: dict,
+                 motion_cfg: dict, log_queue: multiprocessing.Queue, cpu_affinity: list = None, niceness: int = None,
+                 conversion_locks: tuple = None):
+        """
+        Initializes the CameraProcess with the CameraReader parameters and the shared configs.
+        Configs are passed as plain dicts so they can be pickled to the child process.
+        `log_queue` is the main process log queue (only the main process writes the log outputs).
+        `conversion_locks` are the (conversion slots, VAAPI) multiprocessing semaphores shared by all camera processes.
+        """
+        self.camera_name = camera_name
+
+        # Camera Process
+        self._camera_stop_event = multiprocessing.Event()
+        self._camera_process = multiprocessing.Process(
+            target=self._run,
+            args=(camera_kwargs, recordings_cfg, motion_cfg, log_queue, cpu_affinity, niceness, conversion_locks, self._camera_stop_event),
+            daemon=True
+        )
+
+    def start(self):
+        """
+        Starts the camera process.
+        """
+        self._camera_process.start()
+
+    def stop(self, timeout: float = CAMERA_STOP_TIMEOUT):
+        """
+        Stops the camera process. Terminates it if it does not stop within `timeout` seconds.
+        """
+        self._camera_stop_event.set()
+        self._camera_process.join(timeout)
+        if self._camera_process.is_alive():
+            logger.warning(f"Camera '{self.camera_name}' process did not stop in time. Terminating it.")
+            self._camera_process.terminate()
+            self._camera_process.join()
+        logger.info(f"Camera '{self.camera_name}' process stopped.")
+
+    @staticmethod
+    def _run(camera_kwargs: dict, recordings_cfg: dict, motion_cfg: dict, log_queue: multiprocessing.Queue,
+             cpu_affinity: list, niceness: int, conversion_locks: tuple, stop_event: multiprocessing.Event):
+        """
+        To be ran in a separate process.
+        Sends the logs to the main process log queue, sets the RecordingManager sub-classes configs (needed if process is not forked),
+        pins the process to the given CPUs and sets its niceness (Linux only, if given),
+        starts the CameraReader and waits for the stop event.
+        Ignores SIGINT, shutdown is handled by the main process through the stop event.
+        """
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        # Send logs to the main process (inherited output handlers are dropped)
+        setup_logger_child(log_queue)
+
+        camera_name = camera_kwargs['camera_name']
+
+        # Pin process to CPUs and set priority (keeps camera threads and driver IRQ work on the same cores)
+        if cpu_affinity is not None:
+            try:
+                os.sched_setaffinity(0, set(c % os.cpu_count() for c in cpu_affinity))
+                logger.info(f"Camera '{camera_name}' process pinned to CPUs {sorted(os.sched_getaffinity(0))}.")
+            except (AttributeError, OSError) as e:
+                logger.warning(f"Could not set CPU affinity for camera '{camera_name}': {e}")
+        if niceness is not None:
+            try:
+                os.nice(niceness - os.nice(0))
+                logger.info(f"Camera '{camera_name}' process niceness set to {os.nice(0)}.")
+            except (AttributeError, OSError) as e:
+                logger.warning(f"Could not set niceness for camera '{camera_name}' (negative values require privileges): {e}")
+
+        # Share h264 conversions locks with the other camera processes
+        if conversion_locks is not None:
+            RecordingManager.setConversionLocks(*conversion_locks)
+
+        # Set StreamRecording Sub-Class Config
+        StreamRecording.setClassConfig(
+            enabled=recordings_cfg['save'],
+            output_dir=recordings_cfg.get('directory', None),
+            max_days_to_save=recordings_cfg.get('max_days_to_save', None),
+            encode_to_h264=recordings_cfg.get('encode_to_h264', None),
+            h264_encoder=recordings_cfg.get('h264_encoder', None),
+            bitrate=recordings_cfg.get('bitrate', None)
+        )
+
+        # Set MotionRecording Sub-Class Config
+        MotionRecording.setClassConfig(
+            enabled=True, # True because this instance is only created if motion for the respective camera is enabled.
+            output_dir=motion_cfg.get('directory', None),
+            max_days_to_save=motion_cfg.get('max_days_to_save', None),
+            encode_to_h264=motion_cfg.get('encode_to_h264', None),
+            h264_encoder=motion_cfg.get('h264_encoder', None),
+            bitrate=motion_cfg.get('bitrate', None)
+        )
+
+        try:
+            camera = CameraReader(**camera_kwargs)
+            camera.start() # Start camera threads
+        except Exception as e:
+            logger.error(f"{e}")
+            return
+
+        stop_event.wait()
+        camera.stop()
+        RecordingManager.stopConversions() # Waits for the h264 conversions to finish
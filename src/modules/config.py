@@ -1,9 +1,99 @@
+import os
+import json
+import mmap
 import yaml
 import cv2
+import functools
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from types import MappingProxyType
 from logger_setup import setup_logger_file, logger
-from utils import check_create_directory
+from utils import check_create_directory, open_video_capture, fourcc_to_str, is_gstreamer_pipeline, is_network_stream
+
+# libyaml C loader if PyYAML was built with it (much faster), otherwise the pure Python one
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def _is_int(value, minimum: int = None, maximum: int = None):
+    """
+    Returns True if value is an integer (not a boolean) within the given inclusive bounds (if given).
+    """
+    return (type(value) is int # Exact type (excludes bool)
+            and (minimum is None or value >= minimum) and (maximum is None or value <= maximum))
+
+# Motion camera numeric fields: (field, type, minimum, maximum, inclusive bounds, error message)
+_MOTION_FIELDS = (
+    ('noise_level', int, 1, 255, True, "must be an integer between 1-255"),
+    ('pixel_threshold', float, 0, 100, False, "must be a float between 0 and 100 %."),
+    ('object_threshold', float, 0, 100, False, "must be a float between 0 and 100 %."),
+    ('minimum_motion_frames', int, 1, None, True, "must be a positive integer."),
+    ('pre_capture', int, 0, None, True, "must be a non-negative integer."),
+    ('post_capture', int, 0, None, True, "must be a non-negative integer."),
+    ('event_gap', int, 0, None, True, "must be a non-negative integer."),
+)
+
+# Parsed config is cached to a JSON sidecar file (faster to load), for config files bigger than this size
+_CONFIG_CACHE_MIN_SIZE = 4096
+
+# Config files bigger than this size are memory-mapped for the YAML parser, instead of read through file buffers
+_CONFIG_MMAP_MIN_SIZE = 256 * 1024
+
+@functools.lru_cache(maxsize=32)
+def _test_h264_encoder(h264_encoder: str):
+    """
+    Checks if h264 encoder is supported by the machine (and is an H.264 encoder) and test if it runs.
+    Also indirectly checks if ffmpeg is installed or in PATH.
+    Successful checks are cached per encoder, so each encoder is only tested once per process (e.g. for Recordings and Motion).
+    """
+    # Encoder presence check: `ffmpeg -h encoder=<name>` only describes the given encoder (instead of listing all encoders)
+    check_command = ['ffmpeg', '-hide_banner', '-h', f'encoder={h264_encoder}']
+
+    # Encoder functional test: short (0.2s) test source encode, enough to validate encoder initialization
+    if h264_encoder == 'h264_vaapi':
+        test_command = [
+            'ffmpeg',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-f', 'lavfi',
+            '-i', 'testsrc=duration=0.2:size=256x144:rate=5',
+            '-vaapi_device', '/dev/dri/renderD128',
+            '-vf', 'format=nv12,hwupload',
+            '-c:v', h264_encoder,
+            '-f', 'null',
+            '-'
+        ]
+    else:
+        test_command = [
+            'ffmpeg',
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-f', 'lavfi',
+            '-i', 'testsrc=duration=0.2:size=128x128:rate=5',
+            '-c:v', h264_encoder,
+            '-f', 'null',
+            '-'
+        ]
+
+    # Run both ffmpeg processes concurrently (independent)
+    try:
+        check_process = subprocess.Popen(check_command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        logger.error("ffmpeg is not installed or not in PATH.")
+        raise
+    test_process = subprocess.Popen(test_command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    check_output, _ = check_process.communicate()
+    _, test_error = test_process.communicate()
+
+    # Encoder header line `Encoder <name> [<long name>]:`, the long name has to describe an H.264 encoder (e.g. not mjpeg, libx265)
+    header = b'Encoder ' + h264_encoder.encode() + b' '
+    header_line = next((line for line in check_output.splitlines() if line.startswith(header)), b'')
+    if b'H.264' not in header_line and b'H264' not in header_line:
+        logger.error(f"Error in ffmpeg or 'h264_encoder': '{h264_encoder}' h264_encoder is not supported on this machine.")
+        raise ValueError(f"'{h264_encoder}' h264_encoder is not supported on this machine.")
+
+    if test_process.returncode != 0:
+        e = subprocess.CalledProcessError(test_process.returncode, test_command, stderr=test_error)
+        logger.error(f"Error with h264_encoder '{h264_encoder}': {e}")
+        raise e
 
 class Config:
     """
@@ -23,6 +113,10 @@ class Config:
         self._cameras = {}
         self._recordings = {}
         self._motion = {}
+        # Read-only views, built once (they reflect later changes to the underlying dicts)
+        self._cameras_ro = MappingProxyType(self._cameras)
+        self._recordings_ro = MappingProxyType(self._recordings)
+        self._motion_ro = MappingProxyType(self._motion)
         self._validate_cameras_config()
         self._validate_recordings_config()
         self._validate_motion_config()
@@ -32,32 +126,74 @@ class Config:
         """
         Returns the read-only cameras configuration.
         """
-        return MappingProxyType(self._cameras)
+        return self._cameras_ro
     
     @property
     def recordings(self):
         """
         Returns the read-only recordings configuration.
         """
-        return MappingProxyType(self._recordings)
+        return self._recordings_ro
     
     @property
     def motion(self):
         """
         Returns the read-only motion configuration.
         """
-        return MappingProxyType(self._motion)
+        return self._motion_ro
 
     def _load_config(self):
         """
         Load the configuration from the YAML file.
+        The parsed configuration is cached to a JSON sidecar file, which is loaded instead while the YAML file is unchanged
+        (same mtime in ns and size as recorded in the cache, so restoring an older YAML file is never served from the cache).
         """
-        with open(self.config_file, 'r') as file:
+        cache_file = self.config_file + '.cache.json'
+        config_stat = os.stat(self.config_file)
+        use_cache = config_stat.st_size >= _CONFIG_CACHE_MIN_SIZE
+
+        # Load cached configuration, if up to date
+        if use_cache:
+            try:
+                with open(cache_file, 'rb') as file:
+                    cache = json.load(file)
+                if cache['source'] == [config_stat.st_mtime_ns, config_stat.st_size]:
+                    return cache['config']
+            except (OSError, ValueError, TypeError, KeyError):
+                pass # No valid cache, parse YAML file
+
+        with open(self.config_file, 'rb') as file: # Bytes stream, decoded by the YAML parser itself
             try:
-                return yaml.safe_load(file)
+                if config_stat.st_size > _CONFIG_MMAP_MIN_SIZE:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as stream:
+                        config = yaml.load(stream, Loader=_YAML_LOADER)
+                else:
+                    config = yaml.load(file, Loader=_YAML_LOADER)
             except yaml.YAMLError as e:
                 logger.error(f"Error loading configuration file: {e}")
                 raise(f"Error loading configuration file: {e}")
+
+        # Cache parsed configuration, only if JSON represents it exactly (e.g. no non-string keys)
+        if use_cache:
+            self._write_config_cache(cache_file, config, config_stat)
+        return config
+
+    def _write_config_cache(self, cache_file: str, config: dict, config_stat: os.stat_result):
+        """
+        Writes the parsed configuration to the JSON cache file (atomically), if JSON represents it exactly,
+        with the YAML file mtime (ns) and size it was parsed from.
+        Failing to write the cache is not an error (e.g. read-only directory).
+        """
+        try:
+            config_json = json.dumps(config)
+            if json.loads(config_json) != config:
+                return
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'w') as file:
+                file.write(f'{{"source": [{config_stat.st_mtime_ns}, {config_stat.st_size}], "config": {config_json}}}')
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError):
+            pass
                 
     def _configure_logger(self):
         """
@@ -85,10 +221,10 @@ class Config:
         if not isinstance(log_dir, str):
             raise TypeError("'directory' in Logs config must be a string.")
 
-        if not isinstance(max_size, int) or max_size < 1 or isinstance(max_size, bool):
+        if not _is_int(max_size, 1):
             raise ValueError("'max_size' must be an integer >= 1.")
 
-        if not isinstance(max_files, int) or max_files < 1 or isinstance(max_files, bool):
+        if not _is_int(max_files, 1):
             raise ValueError("'max_files' must be an integer >= 1.")
 
         check_create_directory(log_dir)
@@ -108,87 +244,27 @@ class Config:
             logger.warning("No camera configurations found.")
             return
 
-        seen_names = []
-        seen_ports = []
+        # Validate and probe each camera in parallel (probes are I/O bound: device init, network handshakes)
+        with ThreadPoolExecutor(max_workers=min(16, len(cameras))) as executor:
+            futures = {cam_id: executor.submit(self._validate_camera_config, cam_cfg) for cam_id, cam_cfg in cameras.items()}
+
+        # Check for duplicates and load valid cameras, in config order
+        seen_names = set()
+        seen_ports = set()
 
-        for cam_id, cam_cfg in cameras.items():
+        for cam_id, future in futures.items():
             try:
-                required_fields = ['camera', 'name', 'target_fps', 'port', 'stream_quality', 'show_fps']
-                for field in required_fields:
-                    if field not in cam_cfg:
-                        raise ValueError(f"Missing required field '{field}'")
+                cam_cfg = future.result()
 
                 name = cam_cfg['name']
-                if not isinstance(name, str):
-                    raise TypeError("'name' must be a string")
                 if name in seen_names:
                     raise ValueError(f"Duplicate camera name: '{name}'")
-                seen_names.append(name)
-
-                for field in ['target_fps', 'port']:
-                    value = cam_cfg[field]
-                    if not isinstance(value, int) or value <= 0 or isinstance(value, bool):
-                        raise ValueError(f"'{field}' must be a positive integer")
+                seen_names.add(name)
 
                 port = cam_cfg['port']
                 if port in seen_ports:
                     raise ValueError(f"Duplicate port number: {port}")
-                seen_ports.append(port)
-
-                stream_quality = cam_cfg['stream_quality']
-                if not isinstance(stream_quality, int) or stream_quality < 0 or stream_quality > 100 or isinstance(stream_quality, bool):
-                    raise ValueError(f"'stream_quality' must be an integer between 0 and 100.")
-
-                show_fps = cam_cfg['show_fps']
-                if not isinstance(show_fps, bool):
-                    raise TypeError("'show_fps' must be a boolean")
-
-                cam_path = cam_cfg['camera']
-                if not isinstance(cam_path, str) and not isinstance(cam_path, int):
-                    raise TypeError("'camera' must be a string or int")
-                
-                try:
-                    cap = cv2.VideoCapture(cam_path)
-                    if not cap.isOpened():
-                        raise ValueError(f"Cannot open camera device '{cam_path}'")
-                    
-                    # Optional Parameters
-                    if 'source_format' in cam_cfg:
-                        fmt = cam_cfg['source_format']
-                        if not isinstance(fmt, str) or len(fmt) != 4:
-                            raise TypeError("'source_format' must be a 4-character string")
-                        fourcc_code = cv2.VideoWriter_fourcc(*fmt)
-                        cap.set(cv2.CAP_PROP_FOURCC, fourcc_code)
-                        actual_fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
-                        actual_fmt = "".join([chr((actual_fourcc >> 8 * i) & 0xFF) for i in range(4)])
-                        if actual_fmt != fmt:
-                            raise ValueError(f"'source_format' '{fmt}' not supported by camera")
-                    
-                    for dim in ['width', 'height']:
-                        if dim in cam_cfg:
-                            val = cam_cfg[dim]
-                            if not isinstance(val, int) or val <= 0 or isinstance(val, bool):
-                                raise ValueError(f"'{dim}' must be a positive integer")
-                            prop = cv2.CAP_PROP_FRAME_WIDTH if dim == 'width' else cv2.CAP_PROP_FRAME_HEIGHT
-                            cap.set(prop, val)
-                            actual = int(cap.get(prop))
-                            if actual != val:
-                                raise ValueError(f"'{dim}' '{val}' not supported by camera")
-                    
-                    if 'source_fps' in cam_cfg:
-                        fps = cam_cfg['source_fps']
-                        if not isinstance(fps, int) or fps <= 0 or isinstance(fps, bool):
-                            raise ValueError("'source_fps' must be a positive integer")
-                        cap.set(cv2.CAP_PROP_FPS, fps)
-                        actual_fps = cap.get(cv2.CAP_PROP_FPS)
-                        if actual_fps != fps:
-                            raise ValueError(f"'source_fps' '{fps}' not supported by camera")
-                        if actual_fps < 1:
-                            logger.warning(f"Camera '{name}' may not report FPS correctly (got {actual_fps}). Continuing anyway.")
-                        elif abs(actual_fps - fps) > 1:
-                            raise ValueError(f"'source_fps' '{fps}' not supported by camera")
-                finally:
-                    cap.release()
+                seen_ports.add(port)
 
                 self._cameras[cam_id] = cam_cfg
                 self._cameras[cam_id]['normalized_name'] = name.lower().replace(' ', '_')
@@ -198,6 +274,112 @@ class Config:
                 logger.error(f"Error in camera with id '{cam_id}': {e}.")
                 logger.warning(f"Camera with id '{cam_id}' will not be loaded.")
 
+    def _validate_camera_config(self, cam_cfg: dict):
+        """
+        Validate a single camera configuration, probing the camera if needed.
+        Returns the camera configuration, raises an exception if it is not valid.
+        Duplicate names and ports are checked by `_validate_cameras_config`.
+        """
+        required_fields = ['camera', 'name', 'target_fps', 'port', 'stream_quality', 'show_fps']
+        for field in required_fields:
+            if field not in cam_cfg:
+                raise ValueError(f"Missing required field '{field}'")
+
+        name = cam_cfg['name']
+        if not isinstance(name, str):
+            raise TypeError("'name' must be a string")
+
+        for field in ['target_fps', 'port']:
+            value = cam_cfg[field]
+            if not _is_int(value, 1):
+                raise ValueError(f"'{field}' must be a positive integer")
+
+        stream_quality = cam_cfg['stream_quality']
+        if not _is_int(stream_quality, 0, 100):
+            raise ValueError(f"'stream_quality' must be an integer between 0 and 100.")
+
+        if 'stream_subsample' in cam_cfg:
+            if cam_cfg['stream_subsample'] not in [444, 422, 420, 'gray'] or type(cam_cfg['stream_subsample']) is bool:
+                raise ValueError("'stream_subsample' must be 444, 422, 420 or 'gray'")
+
+        show_fps = cam_cfg['show_fps']
+        if not isinstance(show_fps, bool):
+            raise TypeError("'show_fps' must be a boolean")
+
+        cam_path = cam_cfg['camera']
+        if not isinstance(cam_path, str) and type(cam_path) is not int:
+            raise TypeError("'camera' must be a string or int")
+
+        # Optional process scheduling parameters
+        if 'cpu_affinity' in cam_cfg:
+            cpus = cam_cfg['cpu_affinity']
+            if not isinstance(cpus, list) or not cpus or not all(_is_int(c, 0) for c in cpus):
+                raise ValueError("'cpu_affinity' must be a non-empty list of non-negative integers")
+
+        if 'niceness' in cam_cfg:
+            niceness = cam_cfg['niceness']
+            if not _is_int(niceness, -20, 19):
+                raise ValueError("'niceness' must be an integer between -20 and 19")
+                
+        # Probe camera only if there is something to verify (opening a camera can take seconds, e.g. network streams):
+        # optional parameters, or the default MJPG format for local devices (GStreamer pipelines and network streams set their own format).
+        # Otherwise, the camera is only opened by its reader.
+        probe_params = ('source_format', 'width', 'height', 'source_fps')
+        mjpg_default = not is_gstreamer_pipeline(cam_path) and not is_network_stream(cam_path)
+        if mjpg_default or any(param in cam_cfg for param in probe_params):
+            try:
+                cap = open_video_capture(cam_path)
+                if not cap.isOpened():
+                    raise ValueError(f"Cannot open camera device '{cam_path}'")
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # Probe never reads frames, so keep the minimum capture buffer
+                    
+                # Optional Parameters
+                if 'source_format' in cam_cfg:
+                    fmt = cam_cfg['source_format']
+                    if not isinstance(fmt, str) or len(fmt) != 4:
+                        raise TypeError("'source_format' must be a 4-character string")
+                    fourcc_code = cv2.VideoWriter_fourcc(*fmt)
+                    cap.set(cv2.CAP_PROP_FOURCC, fourcc_code)
+                    actual_fmt = fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC))
+                    if actual_fmt != fmt:
+                        raise ValueError(f"'source_format' '{fmt}' not supported by camera")
+                elif mjpg_default:
+                    # Default to MJPG if supported (compressed in camera, ~10x less USB bandwidth than YUYV)
+                    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                    actual_fmt = fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC))
+                    if actual_fmt == 'MJPG':
+                        cam_cfg['source_format'] = 'MJPG'
+                        logger.info(f"Camera '{name}' supports MJPG, using it as 'source_format'.")
+                    
+                for dim in ['width', 'height']:
+                    if dim in cam_cfg:
+                        val = cam_cfg[dim]
+                        if not _is_int(val, 1):
+                            raise ValueError(f"'{dim}' must be a positive integer")
+                        prop = cv2.CAP_PROP_FRAME_WIDTH if dim == 'width' else cv2.CAP_PROP_FRAME_HEIGHT
+                        cap.set(prop, val)
+                        actual = int(cap.get(prop))
+                        if actual != val:
+                            raise ValueError(f"'{dim}' '{val}' not supported by camera")
+                    
+                if 'source_fps' in cam_cfg:
+                    fps = cam_cfg['source_fps']
+                    if not _is_int(fps, 1):
+                        raise ValueError("'source_fps' must be a positive integer")
+                    cap.set(cv2.CAP_PROP_FPS, fps)
+                    actual_fps = cap.get(cv2.CAP_PROP_FPS)
+                    if actual_fps != fps:
+                        raise ValueError(f"'source_fps' '{fps}' not supported by camera")
+                    if actual_fps < 1:
+                        logger.warning(f"Camera '{name}' may not report FPS correctly (got {actual_fps}). Continuing anyway.")
+                    elif abs(actual_fps - fps) > 1:
+                        raise ValueError(f"'source_fps' '{fps}' not supported by camera")
+            finally:
+                cap.release()
+
+
+        return cam_cfg
+
     def _validate_recordings_config(self):
         """
         Validate the Recordings configuration from cofig file.
@@ -219,43 +401,58 @@ class Config:
         if not save_flag:
             logger.warning("Cameras recordings are disabled.")
         else:
-            rec_dir = rec_cfg.get('directory')
-            max_days = rec_cfg.get('max_days_to_save')
-            encode_to_h264 = rec_cfg.get('encode_to_h264')
-
-            if not isinstance(rec_dir, str):
-                logger.error("'directory' must be a string in Recordings config.")
-                raise TypeError("'directory' must be a string in Recordings config.")
-            self._recordings['directory'] = rec_dir
-
-            if not isinstance(max_days, int) or max_days < 1 or isinstance(max_days, bool):
-                logger.error("'max_days_to_save' must be an integer >= 1 in Recordings config.")
-                raise ValueError("'max_days_to_save' must be an integer >= 1 in Recordings config.")
-            self._recordings['max_days_to_save'] = max_days
-            
-            if not isinstance(encode_to_h264, int) or encode_to_h264 not in [0,1,2] or isinstance(encode_to_h264, bool):
-                logger.error("'encode_to_h264' must be an integer equal to 0, 1, or 2 in Recordings config.")
-                raise ValueError("'encode_to_h264' must be an integer equal to 0, 1, or 2 in Recordings config.")
-            self._recordings['encode_to_h264'] = encode_to_h264
-            
-            if encode_to_h264 in [1, 2]:
-                h264_encoder = rec_cfg.get('h264_encoder')
-                bitrate = rec_cfg.get('bitrate')
-
-                if not isinstance(h264_encoder, str):
-                    logger.error("'h264_encoder' must be a string in Recordings config.")
-                    raise TypeError("'h264_encoder' must be a string in Recordings config.")
-                self._test_h264_encoder(h264_encoder)
-                self._recordings['h264_encoder'] = h264_encoder
-
-                if not isinstance(bitrate, int) or bitrate < 1 or isinstance(bitrate, bool):
-                    logger.error("'bitrate' must be an integer >= 1 in Recordings config.")
-                    raise ValueError("'bitrate' must be an integer >= 1 in Recordings config.")
-                self._recordings['bitrate'] = bitrate
-
-            check_create_directory(rec_dir)
+            self._recordings.update(self._validate_output_config(rec_cfg, 'Recordings'))
+            check_create_directory(self._recordings['directory'])
             logger.info("Cameras recordings are enabled.")
     
+    @staticmethod
+    def _validate_output_config(cfg: dict, section: str):
+        """
+        Validate the output fields of a configuration section (Recordings or Motion):
+        'directory', 'max_days_to_save', 'encode_to_h264', and the h264 encoder and bitrate if encoding to h264.
+        Returns a dict with the validated fields.
+        """
+        output_dir = cfg.get('directory')
+        max_days = cfg.get('max_days_to_save')
+        encode_to_h264 = cfg.get('encode_to_h264')
+
+        if not isinstance(output_dir, str):
+            logger.error(f"'directory' must be a string in {section} config.")
+            raise TypeError(f"'directory' must be a string in {section} config.")
+
+        if not _is_int(max_days, 1):
+            logger.error(f"'max_days_to_save' must be an integer >= 1 in {section} config.")
+            raise ValueError(f"'max_days_to_save' must be an integer >= 1 in {section} config.")
+
+        if not _is_int(encode_to_h264, 0, 2):
+            logger.error(f"'encode_to_h264' must be an integer equal to 0, 1, or 2 in {section} config.")
+            raise ValueError(f"'encode_to_h264' must be an integer equal to 0, 1, or 2 in {section} config.")
+
+        output_cfg = {'directory': output_dir, 'max_days_to_save': max_days, 'encode_to_h264': encode_to_h264}
+        if encode_to_h264 in [1, 2]:
+            output_cfg.update(Config._validate_encoder_config(cfg, section))
+        return output_cfg
+
+    @staticmethod
+    def _validate_encoder_config(cfg: dict, section: str):
+        """
+        Validate the h264 encoder and bitrate of a configuration section (Recordings or Motion), used when encoding to h264.
+        Returns a dict with the validated 'h264_encoder' and 'bitrate'.
+        """
+        h264_encoder = cfg.get('h264_encoder')
+        bitrate = cfg.get('bitrate')
+
+        if not isinstance(h264_encoder, str):
+            logger.error(f"'h264_encoder' must be a string in {section} config.")
+            raise TypeError(f"'h264_encoder' must be a string in {section} config.")
+        _test_h264_encoder(h264_encoder)
+
+        if not _is_int(bitrate, 1):
+            logger.error(f"'bitrate' must be an integer >= 1 in {section} config.")
+            raise ValueError(f"'bitrate' must be an integer >= 1 in {section} config.")
+
+        return {'h264_encoder': h264_encoder, 'bitrate': bitrate}
+
     def _validate_motion_config(self):
         """
         Validate the Motion configuration from cofig file.
@@ -263,8 +460,8 @@ class Config:
         # Validate Motion
         motion_cfg = self.config.get('Motion', {})
 
-        # Get Motion config keys list
-        motion_keys = list(motion_cfg.keys())
+        # Get Motion config keys set (keys left at the end are for non-loaded cameras)
+        motion_keys = set(motion_cfg)
 
         # Get loaded cameras id list
         loaded_cameras_id = list(self._cameras.keys())
@@ -288,34 +485,16 @@ class Config:
                         logger.warning(f"Motion for camera '{camera_name}' is disabled.")
                         continue
 
-                    noise_level = cam_motion_cfg.get('noise_level')
-                    pixel_threshold = cam_motion_cfg.get('pixel_threshold')
-                    object_threshold = cam_motion_cfg.get('object_threshold')
-                    minimum_motion_frames = cam_motion_cfg.get('minimum_motion_frames')
-                    pre_capture = cam_motion_cfg.get('pre_capture')
-                    post_capture = cam_motion_cfg.get('post_capture')
-                    event_gap = cam_motion_cfg.get('event_gap')
-
-                    if not isinstance(noise_level, int) or noise_level < 1 or noise_level > 255 or isinstance(noise_level, bool):
-                        raise ValueError("'noise_level' must be an integer between 1-255")
-                    
-                    if not isinstance(pixel_threshold, float) or pixel_threshold <= 0 or pixel_threshold >= 100 or isinstance(pixel_threshold, bool):
-                        raise ValueError("'pixel_threshold' must be a float between 0 and 100 %.")
-                    
-                    if not isinstance(object_threshold, float) or object_threshold <= 0 or object_threshold >= 100 or isinstance(object_threshold, bool):
-                        raise ValueError("'object_threshold' must be a float between 0 and 100 %.")
-                    
-                    if not isinstance(minimum_motion_frames, int) or minimum_motion_frames < 1 or isinstance(minimum_motion_frames, bool):
-                        raise ValueError("'minimum_motion_frames' must be a positive integer.")
-
-                    if not isinstance(pre_capture, int) or pre_capture < 0 or isinstance(pre_capture, bool):
-                        raise ValueError("'pre_capture' must be a non-negative integer.")
-
-                    if not isinstance(post_capture, int) or post_capture < 0 or isinstance(post_capture, bool):
-                        raise ValueError("'post_capture' must be a non-negative integer.")
-
-                    if not isinstance(event_gap, int) or event_gap < 0 or isinstance(event_gap, bool):
-                        raise ValueError("'event_gap' must be a non-negative integer.")
+                    for field, field_type, minimum, maximum, inclusive, error in _MOTION_FIELDS:
+                        value = cam_motion_cfg.get(field)
+                        if type(value) is not field_type: # Exact type (excludes bool)
+                            raise ValueError(f"'{field}' {error}")
+                        if inclusive:
+                            in_bounds = value >= minimum and (maximum is None or value <= maximum)
+                        else:
+                            in_bounds = value > minimum and (maximum is None or value < maximum)
+                        if not in_bounds:
+                            raise ValueError(f"'{field}' {error}")
 
                     self._motion[camid] = cam_motion_cfg
                     logger.info(f"Motion for camera '{camera_name}' enabled.")
@@ -323,12 +502,11 @@ class Config:
                     logger.error(f"Error in motion config for camera '{camera_name}': {e}.")
                     logger.warning(f"Motion for camera '{camera_name}' will be disabled.")
                 finally:
-                    motion_keys.remove(camid)
+                    motion_keys.discard(camid)
         
         # Necessary motion configs if at least one motion is active
         required_fields = ['directory', 'max_days_to_save', 'encode_to_h264']
-        [motion_keys.remove(k) for k in required_fields if k in motion_keys]
-        [motion_keys.remove(k) for k in ['h264_encoder', 'bitrate'] if k in motion_keys]
+        motion_keys.difference_update(required_fields, ['h264_encoder', 'bitrate'])
         if self._motion:
             for field in required_fields:
                 if field not in motion_cfg:
@@ -336,95 +514,9 @@ class Config:
                     raise ValueError(f"Error in motion config: Missing required field '{field}'.")
         
             # Check required fields
-            motion_dir = motion_cfg.get('directory')
-            max_days = motion_cfg.get('max_days_to_save')
-            encode_to_h264 = motion_cfg.get('encode_to_h264')
-
-            if not isinstance(motion_dir, str):
-                logger.error("'directory' must be a string in Motion config.")
-                raise TypeError("'directory' must be a string in Motion config.")
-            self._motion['directory'] = motion_dir
-
-            if not isinstance(max_days, int) or max_days < 1 or isinstance(max_days, bool):
-                logger.error("'max_days_to_save' must be an integer >= 1 in Motion config.")
-                raise ValueError("'max_days_to_save' must be an integer >= 1 in Motion config.")
-            self._motion['max_days_to_save'] = max_days
-
-            if not isinstance(encode_to_h264, int) or encode_to_h264 not in [0,1,2] or isinstance(encode_to_h264, bool):
-                logger.error("'encode_to_h264' must be an integer equal to 0, 1, or 2 in Motion config.")
-                raise ValueError("'encode_to_h264' must be an integer equal to 0, 1, or 2 in Motion config.")
-            self._motion['encode_to_h264'] = encode_to_h264
-
-            if encode_to_h264 in [1, 2]:
-                h264_encoder = motion_cfg.get('h264_encoder')
-                bitrate = motion_cfg.get('bitrate')
-
-                if not isinstance(h264_encoder, str):
-                    logger.error("'h264_encoder' must be a string in Motion config.")
-                    raise TypeError("'h264_encoder' must be a string in Motion config.")
-                self._test_h264_encoder(h264_encoder)
-                self._motion['h264_encoder'] = h264_encoder
-
-                if not isinstance(bitrate, int) or bitrate < 1 or isinstance(bitrate, bool):
-                    logger.error("'bitrate' must be an integer >= 1 in Motion config.")
-                    raise ValueError("'bitrate' must be an integer >= 1 in Motion config.")
-                self._motion['bitrate'] = bitrate
-
-            check_create_directory(motion_dir)
+            self._motion.update(self._validate_output_config(motion_cfg, 'Motion'))
+            check_create_directory(self._motion['directory'])
         
         # Give warning about motion config for cameras id that were not loaded
-        for nonloadcamid in motion_keys:
+        for nonloadcamid in (k for k in motion_cfg if k in motion_keys): # In config order
             logger.warning(f"Motion config given for non-loaded camera with id '{nonloadcamid}'.")
-    
-    @staticmethod
-    def _test_h264_encoder(h264_encoder: str):
-        """
-        Checks if h264 encoder is supported by the machine and test if it runs.
-        Also indirectly checks if ffmpeg is installed or in PATH.
-        """
-        try:
-            result = subprocess.run(
-                ['ffmpeg', '-hide_banner', '-encoders'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-            if not any(h264_encoder in line and '(codec h264)' in line for line in result.stdout.splitlines()):
-                raise ValueError(f"'{h264_encoder}' h264_encoder is not supported on this machine.")
-        except FileNotFoundError:
-            logger.error("ffmpeg is not installed or not in PATH.")
-            raise
-        except Exception as e:
-            logger.error(f"Error in ffmpeg or 'h264_encoder': {e}")
-            raise
-
-        try:
-            if h264_encoder == 'h264_vaapi':
-                test_command = [
-                    'ffmpeg',
-                    '-hide_banner',
-                    '-loglevel', 'error',
-                    '-f', 'lavfi',
-                    '-i', 'testsrc=duration=1:size=256x144:rate=5',
-                    '-vaapi_device', '/dev/dri/renderD128',
-                    '-vf', 'format=nv12,hwupload',
-                    '-c:v', h264_encoder,
-                    '-f', 'null',
-                    '-'
-                ]
-            else:
-                test_command = [
-                    'ffmpeg',
-                    '-hide_banner',
-                    '-loglevel', 'error',
-                    '-f', 'lavfi',
-                    '-i', 'testsrc=duration=1:size=128x128:rate=5',
-                    '-c:v', h264_encoder,
-                    '-f', 'null',
-                    '-'
-                ]
-            subprocess.run(test_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        except Exception as e:
-            logger.error(f"Error with h264_encoder '{h264_encoder}': {e}")
-            raise
\ No newline at end of file
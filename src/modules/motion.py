@@ -1,11 +1,13 @@
 import cv2
 import threading
 import numpy as np
-from queue import Queue, Empty
 from collections import deque
 from modules.recording.motion_recording import MotionRecording
 from logger_setup import logger
 
+# Dilation kernel (5x5 rectangle, equivalent to 2 iterations of the default 3x3 kernel)
+_DILATE_KERNEL = np.ones((5, 5), dtype=np.uint8)
+
 class Motion:
     """
     Motion Module Class.
@@ -20,8 +22,9 @@ class Motion:
           this new motion will be saved in the same motion event file.
         - Ends if during `event_gap` no  motion is detected.
     
-        NOTE: This Module is supposed to be running in a different Process (Multiprocessing), 
-              however due to several issues it will be ran, for now, only in another thread.
+        NOTE: This Module runs in a thread of its camera process (see CameraProcess), so it does not share
+              the GIL with other cameras. Its OpenCV calls (preprocessing, differencing, labelling) release the GIL,
+              so it also runs in parallel with the camera capture and encoding threads.
     """
 
     def __init__(self, camera_name: str, camera_name_norm: str, target_fps: int, enabled: bool,
@@ -56,7 +59,8 @@ class Motion:
 
         # Initialize tupple (raw, encoded) frames queue
         max_motion_queue_size = 20 # Allow some buffer for frames (lower this if RAM usage is too high) (raw frames are heavy)
-        self.motion_queue = Queue(maxsize=max_motion_queue_size)
+        self.motion_queue = deque(maxlen=max_motion_queue_size) # Single producer/consumer (append/popleft are atomic, no lock needed)
+        self._motion_frame_ready = threading.Event() # Set by frame dispatcher when a frame is appended
         
         # Motion Thread
         self._motion_process = threading.Thread(
@@ -79,10 +83,9 @@ class Motion:
         If the queue is full, the frame is dropped.
         """
         if self.enabled:
-            try:
-                self.motion_queue.put_nowait((raw_frame, encoded_frame, time))
-            except:
-                pass  # Drop frame if queue is full 
+            if len(self.motion_queue) < self.motion_queue.maxlen: # Drop frame if queue is full
+                self.motion_queue.append((raw_frame, encoded_frame, time))
+                self._motion_frame_ready.set()
 
     def start(self):
         """
@@ -98,6 +101,7 @@ class Motion:
         """
         if self.enabled:
             self._motion_process_stop_event.set()
+            self._motion_frame_ready.set() # Wake up motion thread
             self._motion_process.join()
             self.motion_recording_manager.stop()
             self._clear_queue()
@@ -107,11 +111,7 @@ class Motion:
         """
         Clears queue.
         """
-        while not self.motion_queue.empty():
-            try:
-                self.motion_queue.get_nowait()
-            except Exception:
-                break
+        self.motion_queue.clear()
 
     def _run(self):
         """
@@ -129,27 +129,29 @@ class Motion:
         pre_capture_buffer = deque(maxlen=self.pre_capture) # buffer for pre_cature encoded frames
         minimum_motion_frames_buffer = deque(maxlen=self.minimum_motion_frames) # buffer for minimum motion frames
 
+        motion_queue = self.motion_queue
+        motion_frame_ready = self._motion_frame_ready
         while not self._motion_process_stop_event.is_set():
 
             # Get raw and encoded frame and time from queue
             try:
-                raw_frame, encoded_frame, frame_time = self.motion_queue.get(timeout=1)
-            except Empty:
-                continue # avoid blocks when exiting
+                raw_frame, encoded_frame, frame_time = motion_queue.popleft()
+            except IndexError:
+                motion_frame_ready.wait(timeout=1) # Woken up by the next frame (or stop), timeout avoids blocks when exiting
+                motion_frame_ready.clear() # Queue is checked again after clearing, so no frame is missed
+                continue
             if raw_frame is None:
                 continue
 
-            # Set processed resolution for fisrt iteration
-            self._set_processed_resolution(raw_frame)
+            # Set processed resolution and previous frame for first iteration
+            if previous_frame is None:
+                self._set_processed_resolution(raw_frame)
+                previous_frame = self._preprocess(raw_frame)
+                continue
 
             # Preprocess
             processed_frame = self._preprocess(raw_frame)
 
-            # Set previous frame for first iteration
-            if previous_frame is None:
-                previous_frame = processed_frame
-                continue
-
             # Frame differencing
             dilated_diff = self._frame_diff(previous_frame, processed_frame)
 
@@ -191,7 +193,7 @@ class Motion:
                             # Start Event in MotionRecording
                             self.motion_recording_manager.start_event(frame_time)
                         
-                        logger.info(f"True Motion Started in camera '{self.camera_name}'.")
+                        logger.info("True Motion Started in camera '%s'.", self.camera_name)
 
                         # Dump frame buffers to RecordingManager, also clearing them
                         self._dump_frames_buffer(pre_capture_buffer)
@@ -212,7 +214,7 @@ class Motion:
                     # End True Motion if idle_frame_count exceeds post_capture
                     if idle_frame_count > self.post_capture:
                         in_true_motion = False
-                        logger.info(f"True Motion Ended in camera '{self.camera_name}'.")
+                        logger.info("True Motion Ended in camera '%s'.", self.camera_name)
                         # Add encoded frame to pre_capture buffer
                         pre_capture_buffer.append(encoded_frame)
                     
@@ -239,69 +241,93 @@ class Motion:
         """
         Set the processed frame resolution, while keeping original frame aspect ratio.
         Scale it to max (w,h) if frame has higher resolution, otherwise leave it.
-        Should only run on the first iteration of motion loop.
+        Only runs on the first iteration of motion loop.
         Set the pixel threshold based on processed resolution.
         Set the motion object threshold based on processed resolution.
         """
-        if not all(self._res):
-            h, w = frame.shape[:2]
-            if w > self._max_w or h > self._max_h:
-                scale_w = self._max_w / w
-                scale_h = self._max_h / h
-                scale = min(scale_w, scale_h)
-                self._res = (int(w * scale), int(h * scale))
-                self._need_resize = True
-            else:
-                self._res = (w, h)
-                self._need_resize = False
-            self.pixel_threshold = int(self._res[0] * self._res[1] * self.pixel_threshold_pct / 100)
-            self.object_threshold = int(self._res[0] * self._res[1] * self.object_threshold_pct / 100)
+        h, w = frame.shape[:2]
+        if w > self._max_w or h > self._max_h:
+            scale_w = self._max_w / w
+            scale_h = self._max_h / h
+            scale = min(scale_w, scale_h)
+            self._res = (int(w * scale), int(h * scale))
+            self._need_resize = True
+        else:
+            self._res = (w, h)
+            self._need_resize = False
+        # Integer downscale step if the processed resolution is an exact integer fraction of the frame, otherwise None
+        step = w // self._res[0]
+        self._resize_step = step if self._need_resize and self._res == (w // step, h // step) and w % step == 0 and h % step == 0 else None
+        self.pixel_threshold = int(self._res[0] * self._res[1] * self.pixel_threshold_pct / 100)
+        self.object_threshold = int(self._res[0] * self._res[1] * self.object_threshold_pct / 100)
+
+        # Preprocessing and frame differencing buffers, reused every frame (allocated once processed resolution is known)
+        self._gray_buf = np.empty((h, w), dtype=np.uint8)
+        self._resized_buf = np.empty((self._res[1], self._res[0]), dtype=np.uint8)
+        self._blurred_bufs = (np.empty_like(self._resized_buf), np.empty_like(self._resized_buf)) # Alternated, one is the previous frame
+        self._blurred_index = 0
+        self._diff_buf = np.empty_like(self._resized_buf)
+        self._dilated_buf = np.empty_like(self._resized_buf)
+        self._labels_buf = np.empty((self._res[1], self._res[0]), dtype=np.uint16) # Labels fit in 16 bits (dilated areas are >= 25 pixels)
     
     def _preprocess(self, frame: bytes):
         """
-        Resize Frame if needed.
         Convert a BGR frame to a preprocessed grayscale image.
-        Apply Gaussian blur to reduce noise and detail.
+        Downscale Frame if needed (after grayscale conversion, so a single channel is resized),
+        by integer stride sampling if possible, otherwise bilinear (motion detection is tolerant to coarse sampling).
+        Apply a box blur (uint8 mean filter) to reduce noise and detail.
+        Writes into preallocated buffers, alternating the output buffer so the previous processed frame is kept.
         """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
         if self._need_resize:
-            frame = cv2.resize(frame, self._res, interpolation=cv2.INTER_AREA)
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        return blurred
+            if self._resize_step:
+                gray = gray[::self._resize_step, ::self._resize_step] # Integer downscale: strided view, no resampling (blur follows)
+            else:
+                gray = cv2.resize(gray, self._res, dst=self._resized_buf, interpolation=cv2.INTER_LINEAR)
+        self._blurred_index ^= 1
+        return cv2.boxFilter(gray, -1, (5, 5), dst=self._blurred_bufs[self._blurred_index], normalize=True)
     
     def _frame_diff(self, prev_frame: bytes, frame: bytes):
         """
         Compute the difference between two preprocessed grayscale frames and highlight areas of motion by
         applying binary threshold to isolate significant changes (using given noise level config) and
         dilating the result to fill small gaps and strengthen detected regions.
+        Writes into preallocated buffers, so the returned image is only valid until the next call.
+        Returns None (no motion) without dilating, if even the dilated result could not reach the pixel threshold
+        (each changed pixel grows to at most the dilation kernel area).
         """
-        diff = cv2.absdiff(prev_frame, frame)
-        _, thresh = cv2.threshold(diff, self.noise_level, 255, cv2.THRESH_BINARY)
-        dilated = cv2.dilate(thresh, None, iterations=2)
-        return dilated
+        diff = cv2.absdiff(prev_frame, frame, dst=self._diff_buf)
+        cv2.threshold(diff, self.noise_level, 255, cv2.THRESH_BINARY, dst=diff) # In place
+        if cv2.countNonZero(diff) * _DILATE_KERNEL.size < self.pixel_threshold:
+            return None
+        return cv2.dilate(diff, _DILATE_KERNEL, dst=self._dilated_buf) # Single 5x5 pass, same as 2 iterations of 3x3
     
     def _is_motion(self, dilated: np.ndarray):
         """
         Check if motion is detected.
         First check if the number of pixels changed (in dilation) is above the given pixel thereshold.
         Then, checks if at least one area of motion is bigger than the given motion object threshold.
+        No motion if `dilated` is None (early exit of `_frame_diff`).
         """
+        if dilated is None: return False
+
         # Check if minimum pixel threshold is reached
         changed_pixels = cv2.countNonZero(dilated)
         if changed_pixels < self.pixel_threshold: return False
 
-        # Check if at least one motion area is above object threshold
-        num_labels, _, stats, _ = cv2.connectedComponentsWithStats(dilated)
-        for i in range(1, num_labels): # index 0 is background label
-            if stats[i, cv2.CC_STAT_AREA] >= self.object_threshold:
-                return True
-        return False
+        # No motion area can be above object threshold if all changed pixels together are not (skips labelling)
+        if changed_pixels < self.object_threshold: return False
+
+        # Check if at least one motion area is above object threshold (BBDT algorithm, 16 bit labels)
+        num_labels, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            dilated, 8, cv2.CV_16U, cv2.CCL_BBDT, labels=self._labels_buf
+        )
+        return num_labels > 1 and stats[1:, cv2.CC_STAT_AREA].max() >= self.object_threshold # index 0 is background label
 
     def _dump_frames_buffer(self, frame_buffer: deque):
         """
         Dumps frame buffer queue to MotionRecording Manager.
         Clears frame buffer queue.
         """
-        for f in frame_buffer:
-            self.motion_recording_manager.write(f)
+        self.motion_recording_manager.write_many(list(frame_buffer)) # Single queue operation for the whole buffer
         frame_buffer.clear()
@@ -1,8 +1,6 @@
 import os
 import threading
-import time
-from queue import Empty
-from modules.recording.recording_manager import RecordingManager
+from modules.recording.recording_manager import RecordingManager, IDLE_WAIT_MIN, IDLE_WAIT_MAX
 from utils import convert_time_to_datetime
 from logger_setup import logger
 
@@ -27,6 +25,9 @@ class MotionRecording(RecordingManager):
                          target_fps=target_fps,
                             max_queue_size=max_queue_size
         )
+
+        # Set by `_run` when all queued frames were written to FFmpeg (waited by `stop_event`)
+        self._queue_drained = threading.Event()
     
     @property
     def _event(self):
@@ -44,6 +45,15 @@ class MotionRecording(RecordingManager):
         if self.enabled:
             logger.info(f"Camera '{self.camera_name}' MotionRecording Manager thread stopped.")
 
+    def write_many(self, frames: list):
+        """
+        Writes a batch of encoded frames to the recording queue as a single item (one queue operation for the whole batch),
+        e.g. the pre_capture and minimum_motion_frames buffers when a True Motion starts.
+        If the queue is full, the oldest item is dropped to make room for the batch.
+        """
+        if frames:
+            self.write(frames)
+
     def start_event(self, frame_time: float):
         """
         Starts a new MotionRecording Event.
@@ -74,16 +84,13 @@ class MotionRecording(RecordingManager):
         This method blocks Motion Thread until its fnished, so that no new frames are added to the queue.
         """
         if self._event:
-            # Wait to dump the queue to FFmpeg process in _run Thread
-            i = 0
-            max_timeout = 10 # seconds, avoid infinite loop
-            max_index = max_timeout * 10 # 10 iterations per second
-            while not self.rec_queue.empty() and i < max_index:
-                time.sleep(0.1)
-                i+=1
+            # Wait to dump the queue to FFmpeg process in _run Thread (wakes _run, which sets `_queue_drained` once the queue is empty)
+            max_timeout = 10 # seconds, avoid infinite wait
+            self._queue_drained.clear()
+            self._frame_ready.set()
             
             # Warn if queue was not fully dumped and max_timeout was reached
-            if not self.rec_queue.empty():
+            if not self._queue_drained.wait(max_timeout):
                 logger.warning(f"MotionRecording queue was not fully dumped in event '{self._current_file_path}' in camera '{self.camera_name}'. Motion Event might be imcomplete. (Max timeout reached)")
                 # Clear the queue, for case it wasn't fully dumped
                 self._clear_queue()
@@ -92,10 +99,9 @@ class MotionRecording(RecordingManager):
             self._stop_ffmpeg()
             logger.info(f"End Motion Event in camera '{self.camera_name}'.")
 
-            # If file exists and config to encode to h264 (=1), convert it to .mp4 in different thread
+            # If file exists and config to encode to h264 (=1), convert it to .mp4 in the conversion pool
             if self.encode_to_h264 == 1 and self._current_file_path and os.path.exists(self._current_file_path):
-                # Considering changing daemon to False to ensure conversion completes before exiting app
-                threading.Thread(target=self._convert_to_h264, args=(self._current_file_path,), daemon=True).start()
+                self._conversion_pool.submit(self._convert_to_h264, self._current_file_path)
 
     def _run(self):
         """
@@ -104,21 +110,30 @@ class MotionRecording(RecordingManager):
         Write the encoded frames bytes to the FFmpeg process stdin Pipe.
         """
         logger.info(f"Starting MotionRecording thread for camera '{self.camera_name}' on '{self.output_dir}'.")
-        while not self._recorder_stop_event.is_set():
+        # Hoist hot attributes to locals (FFmpeg process is not hoisted, it changes on every event)
+        stop_is_set = self._recorder_stop_event.is_set
+        read_many, write_ffmpeg = self._read_many, self._write_ffmpeg
+        rec_queue = self.rec_queue
+        drained_is_set, drained_set = self._queue_drained.is_set, self._queue_drained.set
+        idle_wait = IDLE_WAIT_MIN
+
+        while not stop_is_set():
             
-            # Read MJPG encoded frame bytes from queue
-            try:
-                frame_bytes = self.rec_queue.get(timeout=1) # Encoded frame in JPEG bytes
-            except Empty:
-                continue
+            # Read MJPG encoded frames bytes (including batches from `write_many`) from queue
+            frames = read_many(idle_wait) # Encoded frames in JPEG bytes
+            idle_wait = IDLE_WAIT_MIN if frames is not None else min(idle_wait * 2, IDLE_WAIT_MAX) # Wait longer while idle (between events)
 
-            # Write the frame to the FFmpeg process stdin pipe
-            if self._ffmpeg_process:
+            # Write the frames to the FFmpeg process stdin pipe
+            if frames is not None and self._ffmpeg_process:
                 try:
-                    self._ffmpeg_process.stdin.write(frame_bytes)
+                    write_ffmpeg(frames)
                 except BrokenPipeError:
-                    logger.error(f"Error in camera '{self.camera_name}': FFmpeg process pipe broken")
+                    logger.error("Error in camera '%s': FFmpeg process pipe broken", self.camera_name)
                     self._stop_ffmpeg()
+
+            # Signal `stop_event` that all queued frames were written
+            if not rec_queue and not self._pending_frames and not drained_is_set():
+                drained_set()
         
         # Clean up on stop
         self._stop_ffmpeg()
\ No newline at end of file
@@ -1,12 +1,60 @@
 import os
+import sys
 import subprocess
 import threading
 import time
-import glob
-from queue import Queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from logger_setup import logger
 from utils import check_create_directory
 
+try:
+    import fcntl
+except ImportError: # Not available on Windows
+    fcntl = None
+
+# FFmpeg stdin kernel pipe size (Linux), so FFmpeg stalls are absorbed without blocking the writer
+FFMPEG_PIPE_SIZE = 1 << 20 # 1 MB (default Linux pipe-max-size for unprivileged processes)
+
+# Recording files extensions (for old files cleanup)
+RECORDING_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.ts')
+
+# Niceness increment of the old files cleanup thread (Linux only, where niceness is per thread)
+CLEANUP_NICENESS = 10
+
+# Min interval (seconds) between dropped frames warnings
+DROP_LOG_INTERVAL = 10
+
+# Load shedding when the recording queue is near full: above the high water mark (fraction of queue size) only every
+# Nth frame is queued, N doubles on each high water crossing (up to MAX_SKIP_STRIDE) and halves below the low water mark
+SHED_HIGH_WATER = 0.9
+SHED_LOW_WATER = 0.5
+MAX_SKIP_STRIDE = 8
+
+# Vectored writes (several frames per syscall), not available on Windows
+HAS_WRITEV = hasattr(os, 'writev')
+
+# Max number of queued frames written to FFmpeg stdin in a single vectored write
+MAX_WRITE_FRAMES = 16
+
+# Max number of buffers per vectored write (`os.writev` fails above the system IOV_MAX)
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError): # Not available (e.g. Windows)
+    _IOV_MAX = -1
+WRITEV_MAX_BUFFERS = min(_IOV_MAX, MAX_WRITE_FRAMES) if _IOV_MAX > 0 else MAX_WRITE_FRAMES
+
+# Recorder threads wait for frames (seconds), doubling from IDLE_WAIT_MIN up to IDLE_WAIT_MAX while the queue is idle.
+# Stop (and motion event end) wake the thread up through the frame ready event.
+IDLE_WAIT_MIN = 1
+IDLE_WAIT_MAX = 10
+
+# Page cache hints for finished recording files, not available on Windows/macOS
+HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+# Max number of concurrent h264 conversions (FFmpeg encode processes), shared by all cameras
+MAX_CONVERSION_WORKERS = 2
+
 
 class RecordingManager:
     """
@@ -24,6 +72,13 @@ class RecordingManager:
     encode_to_h264 = None
     h264_encoder = None
     bitrate = None
+
+    # h264 conversions queue for all cameras (avoids all cameras starting an encoder on the same rotation second).
+    # Threads are enough, the encoding itself runs in the FFmpeg process.
+    _conversion_pool = ThreadPoolExecutor(max_workers=MAX_CONVERSION_WORKERS, thread_name_prefix='h264_conversion')
+    # Conversions slots and VAAPI lock. Replaced by multiprocessing ones with `setConversionLocks`, to be shared by all camera processes.
+    _conversion_slots = threading.BoundedSemaphore(MAX_CONVERSION_WORKERS)
+    _vaapi_semaphore = threading.Semaphore(1) # Single hardware encode at a time on the VAAPI render device
     
     def __init__(self, camera_name: str, camera_name_norm: str, target_fps: int, max_queue_size: int = 100):
         """
@@ -44,10 +99,32 @@ class RecordingManager:
         )
         self._recorder_stop_event = threading.Event()
         self._ffmpeg_process = None
+        self._ffmpeg_stderr_thread = None
         self._current_file_path = None
 
+        # Finished recording files (mtime, path), oldest first. Built on first cleanup, then appended as files are finished.
+        self._file_log = None
+        self._file_log_lock = threading.Lock()
+
         # Initialize recording encoded frames queue 
-        self.rec_queue = Queue(maxsize=max_queue_size)
+        self.rec_queue = deque(maxlen=max_queue_size) # Single producer/consumer (append/popleft are atomic, no lock needed)
+        self._frame_ready = threading.Event() # Set by producer when a frame is appended
+        self._pending_frames = [] # Frames of a dequeued batch left over by `_read_many` (beyond `MAX_WRITE_FRAMES`)
+
+        # Dropped frames statistics (indicator of FFmpeg/disk not keeping up), logged at most every DROP_LOG_INTERVAL seconds
+        self.dropped_frames = 0
+        self._dropped_frames_logged = 0
+        self._next_drop_log_time = 0.0
+
+        # Load shedding (spreads dropped frames evenly instead of dropping bursts of the oldest frames)
+        self._shed_high_depth = max(1, int(max_queue_size * SHED_HIGH_WATER))
+        self._shed_low_depth = int(max_queue_size * SHED_LOW_WATER)
+        self._skip_stride = 1
+        self._skip_count = 0
+        self._above_high_water = False
+
+        # FFmpeg recording command (output file path is set on each FFmpeg start)
+        self._ffmpeg_cmd = self._build_ffmpeg_cmd()
     
     @classmethod
     def setClassConfig(cls, enabled: bool, output_dir: str = None, 
@@ -64,17 +141,83 @@ class RecordingManager:
         cls.h264_encoder = h264_encoder
         cls.bitrate = bitrate
 
+    @staticmethod
+    def setConversionLocks(conversion_slots, vaapi_semaphore):
+        """
+        Set the h264 conversions locks shared across all camera processes (multiprocessing semaphores),
+        so that the conversions limits apply to all cameras and not to each camera process.
+        To be called before any instance is created.
+        """
+        RecordingManager._conversion_slots = conversion_slots
+        RecordingManager._vaapi_semaphore = vaapi_semaphore
+
+    @staticmethod
+    def stopConversions():
+        """
+        Stops the h264 conversions pool, to be called when the camera process stops (after the recordings are stopped).
+        Waits for the queued and running conversions to finish (including the files finished on stop), so they are not aborted.
+        """
+        RecordingManager._conversion_pool.shutdown(wait=True)
+
     def write(self, frame: bytes):
         """
         Writes a encoded frame to the recording queue, if enabled is enabled.
-        If the queue is full, the frame is dropped.
+        The queue decouples the caller from FFmpeg/disk I/O stalls.
+        If the queue is near full, only every Nth frame is queued (see `_shed_frame`).
+        If the queue is full, the oldest frame is dropped to make room for the new one (counted in `dropped_frames`).
         """
         if self.enabled:
-            try:
-                self.rec_queue.put_nowait(frame)
-            except:
-                pass  # Drop frame if queue is full 
+            rec_queue = self.rec_queue
+            if (len(rec_queue) >= self._shed_high_depth or self._skip_stride > 1) and self._shed_frame(len(rec_queue)):
+                return
+            if len(rec_queue) == rec_queue.maxlen:
+                self._count_dropped_frame()
+            rec_queue.append(frame) # Drops oldest frame if full
+            self._frame_ready.set()
+
+    def _count_dropped_frame(self):
+        """
+        Counts a frame dropped from the full recording queue.
+        Logs a warning with the number of frames dropped since the last one, at most every `DROP_LOG_INTERVAL` seconds.
+        """
+        self.dropped_frames += 1
+        now = time.monotonic()
+        if now >= self._next_drop_log_time:
+            logger.warning("Camera '%s': recording queue full, %d frame(s) dropped (%d total). FFmpeg or disk is not keeping up.",
+                           self.camera_name, self.dropped_frames - self._dropped_frames_logged, self.dropped_frames)
+            self._dropped_frames_logged = self.dropped_frames
+            self._next_drop_log_time = now + DROP_LOG_INTERVAL
     
+    def _shed_frame(self, depth: int):
+        """
+        Updates the skip stride from the recording queue depth and returns True if the frame has to be skipped.
+        The stride doubles each time the depth crosses the high water mark (up to `MAX_SKIP_STRIDE`),
+        and halves while the depth is below the low water mark. Skipped frames are counted in `dropped_frames`.
+        """
+        stride = self._skip_stride
+        if depth >= self._shed_high_depth:
+            if not self._above_high_water:
+                self._above_high_water = True
+                stride = min(stride * 2, MAX_SKIP_STRIDE)
+        else:
+            self._above_high_water = False
+            if depth < self._shed_low_depth:
+                stride //= 2
+        if stride != self._skip_stride:
+            self._skip_stride = stride
+            if stride > 1:
+                logger.warning("Camera '%s': recording queue at %d/%d, queuing 1 of every %d frames.",
+                               self.camera_name, depth, self.rec_queue.maxlen, stride)
+            else:
+                logger.info("Camera '%s': recording queue at %d/%d, queuing all frames again.",
+                            self.camera_name, depth, self.rec_queue.maxlen)
+        if stride > 1:
+            self._skip_count += 1
+            if self._skip_count % stride:
+                self._count_dropped_frame()
+                return True
+        return False
+
     def start(self):
         """
         Starts the recording manager thread, if enabled is enabled.
@@ -88,6 +231,7 @@ class RecordingManager:
         """
         if self.enabled:
             self._recorder_stop_event.set()
+            self._frame_ready.set() # Wake up recorder thread
             self._recorder_thread.join()
             self._clear_queue()
     
@@ -97,14 +241,51 @@ class RecordingManager:
         It records the frames encoded in MJPG format (recived from stream thread) to an .avi file or
         encodes the frames encoded in MJPG format (recived from stream thread) to h264 and then records to an .mp4 file.
         FFmpeg Process receives frames from stdin Pipeline, which is opened here.
+        Uses the FFmpeg command built at init, only the output file path (last argument) is replaced.
         """
         logger.info(f"Camera '{self.camera_name}': Starting FFmpeg process for recording file '{self._current_file_path}'.")
+        cmd = self._ffmpeg_cmd
+        cmd[-1] = self._current_file_path
+        self._ffmpeg_process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0) # Unbuffered, frames are written with `_write_ffmpeg`
+        if fcntl is not None:
+            try:
+                fcntl.fcntl(self._ffmpeg_process.stdin.fileno(), getattr(fcntl, 'F_SETPIPE_SZ', 1031), FFMPEG_PIPE_SIZE) # Enlarge kernel pipe (Linux)
+            except OSError:
+                pass # Keep default pipe size (e.g. not Linux, or above pipe-max-size)
+        self._ffmpeg_stderr_thread = threading.Thread(target=self._log_ffmpeg_stderr, args=(self._ffmpeg_process.stderr,), daemon=True)
+        self._ffmpeg_stderr_thread.start()
+
+    def _log_ffmpeg_stderr(self, stderr):
+        """
+        To be ran in a separate thread, for each FFmpeg process.
+        Drains the FFmpeg process stderr pipe (so FFmpeg never blocks on it) and logs its messages (errors only, `-loglevel error`).
+        Returns when FFmpeg exits (pipe closed).
+        """
+        fd = stderr.fileno()
+        try:
+            for chunk in iter(lambda: os.read(fd, 4096), b''):
+                for line in chunk.decode(errors='replace').splitlines():
+                    if line.strip():
+                        logger.error("Camera '%s' FFmpeg ('%s'): %s", self.camera_name, self._current_file_path, line.strip())
+        except OSError:
+            pass
+        finally:
+            stderr.close()
+
+    def _build_ffmpeg_cmd(self):
+        """
+        Builds the FFmpeg recording command from the config parameters (constant after init).
+        The last argument is the output file path, set by `_start_ffmpeg`.
+        """
         if self.encode_to_h264 in [0, 1]: # MJPG .avi for current hour file
             cmd = [
                 'ffmpeg',
                 '-hide_banner', # hide ffmpeg log prints
                 '-loglevel', 'error', # hide ffmpeg log prints except error
                 '-y', # overwrite output file if exists (needed as we are continuously writing to the same file within the same hour)
+                '-thread_queue_size', '512', # input packets queue (absorbs bursts of piped frames)
+                '-analyzeduration', '0', # no input analysis, input format and frame rate are given
+                '-fflags', 'nobuffer', # no input buffering
                 '-f', 'mjpeg', # input format of frames (we are piping JPEG-encoded frames)
                 '-framerate', str(self.target_fps), # input frame rate
                 '-i', 'pipe:0', # input comes from STDIN (pipe:0 = standard input)
@@ -119,6 +300,9 @@ class RecordingManager:
                     '-hide_banner',
                     '-loglevel', 'error',
                     '-y',
+                    '-thread_queue_size', '512',
+                    '-analyzeduration', '0',
+                    '-fflags', 'nobuffer',
                     '-f', 'mjpeg',
                     '-framerate', str(self.target_fps),
                     '-i', 'pipe:0',
@@ -128,7 +312,7 @@ class RecordingManager:
                     '-c:v', self.h264_encoder, # encode to h264
                     '-b:v', f'{self.bitrate}k', # output bitrate
                     #'-movflags', 'frag_keyframe+empty_moov+default_base_moof', # for fragmented-mp4 (fmp4)
-                    self._current_file_path
+                    *self._ffmpeg_output_args() # output file (or segment muxer)
                 ]
             elif self.h264_encoder == 'h264_v4l2m2m':
                 cmd = [
@@ -136,6 +320,9 @@ class RecordingManager:
                     '-hide_banner',
                     '-loglevel', 'error',
                     '-y',
+                    '-thread_queue_size', '512',
+                    '-analyzeduration', '0',
+                    '-fflags', 'nobuffer',
                     '-f', 'mjpeg',
                     '-framerate', str(self.target_fps),
                     '-i', 'pipe:0',
@@ -144,7 +331,7 @@ class RecordingManager:
                     '-c:v', self.h264_encoder, # encode to h264
                     '-b:v', f'{self.bitrate}k',
                     #'-movflags', 'frag_keyframe+empty_moov+default_base_moof', # for fragmented-mp4 (fmp4)
-                    self._current_file_path
+                    *self._ffmpeg_output_args() # output file (or segment muxer)
                 ]
             elif self.h264_encoder == 'h264_qsv':
                 cmd = [
@@ -152,6 +339,9 @@ class RecordingManager:
                     '-hide_banner',
                     '-loglevel', 'error',
                     '-y',
+                    '-thread_queue_size', '512',
+                    '-analyzeduration', '0',
+                    '-fflags', 'nobuffer',
                     '-f', 'mjpeg',
                     '-framerate', str(self.target_fps),
                     '-i', 'pipe:0',
@@ -160,7 +350,29 @@ class RecordingManager:
                     '-preset', 'veryfast', # h264_qsv does not support ultrafast preset
                     '-b:v', f'{self.bitrate}k',
                     #'-movflags', 'frag_keyframe+empty_moov+default_base_moof', # for fragmented-mp4 (fmp4)
-                    self._current_file_path
+                    *self._ffmpeg_output_args() # output file (or segment muxer)
+                ]
+            elif self.h264_encoder == 'h264_nvenc':
+                cmd = [
+                    'ffmpeg',
+                    '-hide_banner',
+                    '-loglevel', 'error',
+                    '-y',
+                    '-thread_queue_size', '512',
+                    '-analyzeduration', '0',
+                    '-fflags', 'nobuffer',
+                    '-f', 'mjpeg',
+                    '-framerate', str(self.target_fps),
+                    '-i', 'pipe:0',
+                    '-r', str(self.target_fps),
+                    '-c:v', self.h264_encoder, # encode to h264
+                    '-preset', 'p4', # h264_nvenc does not support ultrafast preset
+                    '-tune', 'll', # low latency
+                    '-delay', '0', # no encoder output delay (frames queued in the encoder)
+                    '-rc', 'cbr', # constant bitrate
+                    '-b:v', f'{self.bitrate}k',
+                    #'-movflags', 'frag_keyframe+empty_moov+default_base_moof', # for fragmented-mp4 (fmp4)
+                    *self._ffmpeg_output_args() # output file (or segment muxer)
                 ]
             else:
                 cmd = [
@@ -168,18 +380,37 @@ class RecordingManager:
                     '-hide_banner',
                     '-loglevel', 'error',
                     '-y',
+                    '-thread_queue_size', '512',
+                    '-analyzeduration', '0',
+                    '-fflags', 'nobuffer',
                     '-f', 'mjpeg',
                     '-framerate', str(self.target_fps),
                     '-i', 'pipe:0',
                     '-r', str(self.target_fps),
                     '-c:v', self.h264_encoder, # encode to h264
                     '-preset', 'ultrafast', # to reduce CPU/GPU usage
+                    *(['-tune', 'zerolatency'] if self.h264_encoder in ['libx264', 'libx265'] else []), # no frames lookahead (x264/x265 only)
                     '-b:v', f'{self.bitrate}k',
                     #'-movflags', 'frag_keyframe+empty_moov+default_base_moof', # for fragmented-mp4 (fmp4)
-                    self._current_file_path
+                    *self._ffmpeg_output_args() # output file (or segment muxer)
                 ]
-        self._ffmpeg_process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        return cmd
     
+    def _ffmpeg_output_args(self):
+        """
+        Returns the FFmpeg output arguments when encoding to h264: the current file path.
+        Can be overridden by sub-classes (e.g. to use the FFmpeg segment muxer), the output file path must be the last argument.
+        """
+        return [self._current_file_path]
+
+    def _reset_file_log(self):
+        """
+        Discards the files log used by `_clean_old_files`, so it is rebuilt from the output directory on next cleanup
+        (e.g. when files are named by FFmpeg and their paths are not known).
+        """
+        with self._file_log_lock:
+            self._file_log = None
+
     def _stop_ffmpeg(self):
         """
         Stops the FFmpeg process if it is running. 
@@ -192,14 +423,103 @@ class RecordingManager:
                 logger.info(f"Camera '{self.camera_name}': FFmpeg process stopped successfully ('{self._current_file_path}').")
             except Exception as e:
                 logger.error(f"Error in camera '{self.camera_name}': Error stopping FFmpeg process ('{self._current_file_path}'): {e}")
+            self._ffmpeg_stderr_thread.join(timeout=1) # Last FFmpeg messages
             self._ffmpeg_process = None
+            if self.encode_to_h264 != 1: # .avi files to be converted are read again by the conversion
+                self._drop_file_cache(self._current_file_path)
+
+    @staticmethod
+    def _drop_file_cache(path: str):
+        """
+        Hints the kernel to drop the page cache of a finished recording file (not read again),
+        so that it does not evict more useful pages. Dirty pages are written back asynchronously (non blocking).
+        """
+        if HAS_FADVISE and path:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                return # e.g. file not created (or segment files named by FFmpeg)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def _read(self, timeout: float = 1):
+        """
+        Pops the oldest encoded frame from the recording queue, waiting up to `timeout` seconds for one.
+        Returns None if no frame is available.
+        """
+        try:
+            return self.rec_queue.popleft()
+        except IndexError:
+            self._frame_ready.wait(timeout)
+            self._frame_ready.clear() # Queue is checked again after clearing, so no frame is missed
+            try:
+                return self.rec_queue.popleft()
+            except IndexError:
+                return None
+
+    def _read_many(self, timeout: float = 1):
+        """
+        Pops the queued encoded frames (up to `MAX_WRITE_FRAMES`, batches from `write_many` are flattened),
+        waiting up to `timeout` seconds for the first one.
+        Frames of a batch beyond `MAX_WRITE_FRAMES` are kept in `_pending_frames` and returned first on the next call.
+        Returns a list of frames, or None if no frame is available.
+        """
+        frames = self._pending_frames
+        if not frames:
+            item = self._read(timeout)
+            if item is None:
+                return None
+            frames = list(item) if type(item) is list else [item]
+        rec_queue = self.rec_queue
+        while len(frames) < MAX_WRITE_FRAMES:
+            try:
+                item = rec_queue.popleft()
+            except IndexError:
+                break
+            if type(item) is list:
+                frames.extend(item)
+            else:
+                frames.append(item)
+        if len(frames) > MAX_WRITE_FRAMES:
+            self._pending_frames = frames[MAX_WRITE_FRAMES:]
+            return frames[:MAX_WRITE_FRAMES]
+        self._pending_frames = []
+        return frames
+
+    def _write_ffmpeg(self, frames: list):
+        """
+        Writes encoded frames to the FFmpeg process stdin pipe.
+        Uses vectored writes (`os.writev`, up to `WRITEV_MAX_BUFFERS` frames each) if available, handling partial writes.
+        Otherwise (Windows) the frames are joined and written with a single write call.
+        Raises BrokenPipeError if FFmpeg process pipe is broken.
+        """
+        stdin = self._ffmpeg_process.stdin
+        if not HAS_WRITEV:
+            stdin.write(frames[0] if len(frames) == 1 else b''.join(frames))
+            return
+        fd = stdin.fileno()
+        while frames:
+            written = os.writev(fd, frames[:WRITEV_MAX_BUFFERS])
+            # Skip fully written frames, keep the remaining part of a partially written one
+            i = 0
+            while i < len(frames) and written >= len(frames[i]):
+                written -= len(frames[i])
+                i += 1
+            frames = frames[i:]
+            if frames and written:
+                frames[0] = memoryview(frames[0])[written:]
 
     def _convert_to_h264(self, avi_path: str):
         """
-        To be ran in seperate Thread.
+        To be ran in the conversion pool (`_conversion_pool`).
         Converts the .avi MJPEG encoded to .mp4 h264 encoded, using ffmpeg.
         """
         mp4_path = avi_path.rsplit('.', 1)[0] + '.mp4' # to convert to mp4
+        mp4_existed = os.path.exists(mp4_path) # Never removed on failure (not written by this conversion)
         logger.info(f"Camera '{self.camera_name}': Starting converting to h264 from '{avi_path}' to '{mp4_path}'")
         if self.h264_encoder == 'h264_vaapi':
             cmd = [
@@ -238,6 +558,18 @@ class RecordingManager:
                 '-movflags', '+faststart',
                 mp4_path
             ]
+        elif self.h264_encoder == 'h264_nvenc':
+            cmd = [
+                'ffmpeg',
+                '-hide_banner',
+                '-loglevel', 'error',
+                '-i', avi_path,
+                '-c:v', self.h264_encoder,
+                '-preset', 'p4', # h264_nvenc does not support ultrafast preset
+                '-b:v', f'{self.bitrate}k',
+                '-movflags', '+faststart',
+                mp4_path
+            ]
         else:
             cmd = [
                 'ffmpeg',
@@ -251,50 +583,93 @@ class RecordingManager:
                 mp4_path
             ]
         try:
-            subprocess.run(cmd, check=True)
+            with self._conversion_slots:
+                if self.h264_encoder == 'h264_vaapi':
+                    with self._vaapi_semaphore:
+                        subprocess.run(cmd, check=True)
+                else:
+                    subprocess.run(cmd, check=True)
             logger.info(f"Camera '{self.camera_name}': Converted '{avi_path}' to '{mp4_path}'")
-            os.remove(avi_path)
+            os.remove(avi_path) # Also frees its page cache
             logger.info(f"Camera '{self.camera_name}': Removed avi file '{avi_path}'")
+            self._drop_file_cache(mp4_path)
+            self._add_finished_file(mp4_path)
         except Exception as e:
             logger.error(f"Error in camera '{self.camera_name}': Failed converting {avi_path} to mp4: {e}")
+            if not mp4_existed:
+                try:
+                    os.remove(mp4_path) # Partial mp4 file, if any
+                except OSError:
+                    pass
+            self._add_finished_file(avi_path) # Keep avi file (and remove it when old)
     
     def _check_file_name(self, filename: str):
         """
         Checks if filename already exists. If yes, adds a (1) before .ext.
         If name with (1) already exists it increments to (2), ....
+        The file is reserved by creating it atomically (O_EXCL), the empty file is overwritten by FFmpeg (`-y`).
         Sets the `self._current_file_path` to the new file path.
         """
         base_name, ext = os.path.splitext(filename)
         filepath = os.path.join(self.output_dir, filename)
         index = 1
-        while os.path.exists(filepath):
-            new_filename = f"{base_name}({index}){ext}"
-            filepath = os.path.join(self.output_dir, new_filename)
-            index += 1
+        while True:
+            try:
+                os.close(os.open(filepath, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                break
+            except FileExistsError:
+                filepath = os.path.join(self.output_dir, f"{base_name}({index}){ext}")
+                index += 1
         self._current_file_path = filepath
 
+    def _add_finished_file(self, path: str):
+        """
+        Adds a finished recording file to the files log used by `_clean_old_files`, if the log was already built
+        (otherwise the file is found when the log is built).
+        """
+        with self._file_log_lock:
+            if self._file_log is not None:
+                self._file_log.append((time.time(), path))
+
     def _clean_old_files(self):
         """
         To be ran in seperate thread.
         Deletes recordig files older than threshold defined by `self.max_days_to_save`.
+        The output directory is only scanned on the first call, to build the files log (sorted by mtime).
+        Next calls only pop the old files from the front of the log (no directory scan nor stat calls).
+        Files are deleted with a lower thread priority (Linux).
         """
         cutoff = time.time() - self.max_days_to_save * 86400
-        for ext in ['avi', 'mp4', '.mkv', '.ts']:
-            pattern = os.path.join(self.output_dir, f"*.{ext}")
-            for f in glob.glob(pattern):
-                if os.path.getmtime(f) < cutoff:
-                    try:
-                        os.remove(f)
-                        logger.info(f"Camera '{self.camera_name}': Deleted old recording '{f}'")
-                    except Exception as e:
-                        logger.error(f"Error in camera '{self.camera_name}': Failed to delete old file '{f}': {e}")
+        with self._file_log_lock:
+            if self._file_log is None:
+                with os.scandir(self.output_dir) as entries:
+                    self._file_log = deque(sorted(
+                        (entry.stat().st_mtime, entry.path) for entry in entries
+                        if entry.name.endswith(RECORDING_EXTENSIONS) and entry.path != self._current_file_path and entry.is_file()
+                    ))
+            old_files = []
+            while self._file_log and self._file_log[0][0] < cutoff:
+                old_files.append(self._file_log.popleft()[1])
+
+        # Lower this thread priority, so that deleting many files (e.g. first cleanup) does not compete with the recording threads
+        if old_files and sys.platform.startswith('linux'):
+            try:
+                os.nice(CLEANUP_NICENESS)
+            except OSError:
+                pass
+
+        for f in old_files:
+            try:
+                os.remove(f)
+                logger.info(f"Camera '{self.camera_name}': Deleted old recording '{f}'")
+            except FileNotFoundError:
+                pass # Already removed (e.g. converted avi file)
+            except Exception as e:
+                logger.error(f"Error in camera '{self.camera_name}': Failed to delete old file '{f}': {e}")
     
     def _clear_queue(self):
         """
-        Clears queue.
+        Clears queue (and the frames left over from a dequeued batch).
         """
-        while not self.rec_queue.empty():
-            try:
-                self.rec_queue.get_nowait()
-            except Exception:
-                break
\ No newline at end of file
+        self.rec_queue.clear()
+        self._pending_frames = []
\ No newline at end of file
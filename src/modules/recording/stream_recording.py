@@ -1,10 +1,13 @@
 import os
+import time
 import threading
 import datetime
-from queue import Empty
-from modules.recording.recording_manager import RecordingManager
+from modules.recording.recording_manager import RecordingManager, IDLE_WAIT_MIN, IDLE_WAIT_MAX
 from logger_setup import logger
 
+# Max delay (seconds) between FFmpeg restarts, when FFmpeg pipe keeps breaking shortly after each restart
+FFMPEG_RESTART_DELAY_MAX = 30
+
 class StreamRecording(RecordingManager):
     """
     StreamRecording  Sub-Class. Child of RecordingManager.
@@ -13,6 +16,7 @@ class StreamRecording(RecordingManager):
     Video Files are saved for every hour.
     The video for the current hour is saved in .avi encoded in MJPG format or .mp4 encoded in h264.
     Afer every hour this .avi file can be converted to .mp4 encoded in h264 format, if config given.
+    When encoding to h264 (.mp4), a single FFmpeg process is kept and its segment muxer splits the files every hour.
     """
 
     def __init__(self, camera_name: str, camera_name_norm: str, target_fps: int):
@@ -31,6 +35,14 @@ class StreamRecording(RecordingManager):
 
         # StreamRecording Manager Thread Parameters
         self._current_hour = None
+        self._next_rotation_time = 0.0 # Epoch time of next file rotation (start of next local hour), forces first rotation
+        self._segmented = self.encode_to_h264 == 2 # FFmpeg segment muxer rotates the .mp4 files (no FFmpeg restart every hour)
+        self._rotation_filename = None # Filename of current hour (before `_check_file_name` suffix)
+
+        # FFmpeg restart (after broken pipe) with exponential backoff
+        self.ffmpeg_restarts = 0
+        self._ffmpeg_restart_time = 0.0 # Epoch time of next FFmpeg restart
+        self._ffmpeg_restart_delay = 0.0
     
     def stop(self):
         """
@@ -49,25 +61,36 @@ class StreamRecording(RecordingManager):
         Checks if the file rotation is met.
         """
         logger.info(f"Starting StreamRecording thread for camera '{self.camera_name}' on '{self.output_dir}'.")
-        while not self._recorder_stop_event.is_set():
+        # Hoist hot attributes to locals (FFmpeg process is not hoisted, it changes on rotation)
+        stop_is_set = self._recorder_stop_event.is_set
+        check_file_rotation = self._check_file_rotation
+        read_many, write_ffmpeg = self._read_many, self._write_ffmpeg
+        idle_wait = IDLE_WAIT_MIN
+
+        while not stop_is_set():
 
             # Check file rotation condition
-            if self._check_file_rotation():
+            if check_file_rotation():
                 self._rotate_file()
                 threading.Thread(target=self._clean_old_files, daemon=True).start() # Thread to delete old files
 
-            try:
-                frame_bytes = self.rec_queue.get(timeout=1) # Encoded frame in JPEG bytes
-            except Empty:
+            frames = read_many(idle_wait) # Encoded frames in JPEG bytes
+            if frames is None:
+                # Idle, wait longer next time (but not past the next file rotation)
+                idle_wait = min(idle_wait * 2, IDLE_WAIT_MAX, max(self._next_rotation_time - time.time(), IDLE_WAIT_MIN))
                 continue
+            idle_wait = IDLE_WAIT_MIN
             
-            # Write the frame to the FFmpeg process stdin pipe
+            # Write the frames to the FFmpeg process stdin pipe (FFmpeg is restarted if its pipe broke, frames are dropped meanwhile)
             if self._ffmpeg_process:
                 try:
-                    self._ffmpeg_process.stdin.write(frame_bytes)
+                    write_ffmpeg(frames)
                 except BrokenPipeError:
-                    logger.error(f"Error in camera '{self.camera_name}': FFmpeg process pipe broken")
+                    logger.error("Error in camera '%s': FFmpeg process pipe broken", self.camera_name)
                     self._stop_ffmpeg()
+                    self._schedule_ffmpeg_restart()
+            elif time.time() >= self._ffmpeg_restart_time:
+                self._restart_ffmpeg()
         
         # Clean up on stop
         self._stop_ffmpeg()
@@ -77,9 +100,12 @@ class StreamRecording(RecordingManager):
         Checks if the condition for file rotation is met. Returns True if yes.
         Updates `self._current_hour` to current hour if condition is met.
         Condition: Rotate file every new hour.
+        Only a float comparison per call, datetimes are only built when rotating.
         """
-        now = datetime.datetime.now()
-        hour = now.replace(minute=0, second=0, microsecond=0)
+        if time.time() < self._next_rotation_time:
+            return False
+        hour = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+        self._next_rotation_time = (hour + datetime.timedelta(hours=1)).timestamp() # Local time (handles non whole hour UTC offsets)
         if self._current_hour != hour:
             self._current_hour = hour
             return True
@@ -90,24 +116,95 @@ class StreamRecording(RecordingManager):
         Rotates the recording file for the current hour.
         Stops the current FFmpeg process, starts a new one for the next hour.
         Starts Thread to encode the previous file to h264 in .mp4, if required.
+        If the FFmpeg segment muxer is used and FFmpeg is running, the file is already rotated by FFmpeg.
         """
+        if self._segmented:
+            if self._ffmpeg_process:
+                logger.info(f"Camera '{self.camera_name}': Recording file rotated by FFmpeg for new hour '{self._current_hour}'.")
+                self._reset_file_log() # Segment files are named by FFmpeg
+                return
+            # FFmpeg not running (first rotation or broken pipe), start it
+            self._current_file_path = os.path.join(self.output_dir, self._segment_filename())
+            logger.info(f"Camera '{self.camera_name}': Starting segmented recording for hour '{self._current_hour}' in '{self._current_file_path}'.")
+            self._start_ffmpeg()
+            return
+
         self._stop_ffmpeg()
 
         # New Filename `name_norm_HHi_HHf_DD_MM_YYYY.ext`
         previous_file_path = self._current_file_path
         next_hour = (self._current_hour.hour + 1) % 24
-        if self.encode_to_h264 in [0, 1]:
-            ext = 'avi'
-        else:
-            ext = 'mp4'
-        filename = f"{self.camera_name_norm}_{self._current_hour.hour:02d}-{next_hour:02d}_{self._current_hour.day:02d}-{self._current_hour.month:02d}-{self._current_hour.year}.{ext}"
-        self._check_file_name(filename)
+        ext = 'avi'
+        self._rotation_filename = f"{self.camera_name_norm}_{self._current_hour.hour:02d}-{next_hour:02d}_{self._current_hour.day:02d}-{self._current_hour.month:02d}-{self._current_hour.year}.{ext}"
+        self._check_file_name(self._rotation_filename)
         logger.info(f"Camera '{self.camera_name}': Rotating recording file for new hour '{self._current_hour}' in '{self._current_file_path}'.")
 
         # Start new ffmpeg process for current hour file
         self._start_ffmpeg()
 
-        # If previous file exists and config to encode to h264 (=1), convert it to .mp4 in different thread
-        if self.encode_to_h264 == 1 and previous_file_path and os.path.exists(previous_file_path):
-            # Considering changing daemon to False to ensure conversion completes before exiting app
-            threading.Thread(target=self._convert_to_h264, args=(previous_file_path,), daemon=True).start()
\ No newline at end of file
+        self._finish_file(previous_file_path)
+
+    def _finish_file(self, file_path: str):
+        """
+        Handles a finished (.avi) recording file.
+        If file exists and config to encode to h264 (=1), converts it to .mp4 in the conversion pool.
+        Otherwise adds it to the files log for cleanup (converted files are added after conversion).
+        """
+        if self.encode_to_h264 == 1 and file_path and os.path.exists(file_path):
+            self._conversion_pool.submit(self._convert_to_h264, file_path)
+        elif file_path:
+            self._add_finished_file(file_path)
+
+    def _schedule_ffmpeg_restart(self):
+        """
+        Schedules the FFmpeg restart after its pipe broke.
+        Restarts immediately, unless FFmpeg broke again within a minute of the last restart,
+        in which case the delay doubles (1s, 2s, 4s, ... up to `FFMPEG_RESTART_DELAY_MAX`).
+        """
+        now = time.time()
+        if now - self._ffmpeg_restart_time < 60:
+            self._ffmpeg_restart_delay = min(max(self._ffmpeg_restart_delay * 2, 1), FFMPEG_RESTART_DELAY_MAX)
+        else:
+            self._ffmpeg_restart_delay = 0.0
+        self._ffmpeg_restart_time = now + self._ffmpeg_restart_delay
+
+    def _restart_ffmpeg(self):
+        """
+        Restarts FFmpeg after its pipe broke, recording to a new file for the current hour:
+        the hour filename with a (n) suffix (the broken file is kept and handled as a finished file),
+        or a new segment file when the segment muxer is used.
+        """
+        self.ffmpeg_restarts += 1
+        if self._segmented:
+            self._current_file_path = os.path.join(self.output_dir, self._segment_filename())
+        else:
+            self._finish_file(self._current_file_path)
+            self._check_file_name(self._rotation_filename)
+        logger.warning(f"Camera '{self.camera_name}': Restarting FFmpeg process in '{self._current_file_path}' (restart {self.ffmpeg_restarts}).")
+        try:
+            self._start_ffmpeg()
+        except OSError as e:
+            logger.error(f"Error in camera '{self.camera_name}': Failed to restart FFmpeg process: {e}")
+            self._ffmpeg_process = None
+            self._schedule_ffmpeg_restart()
+
+    def _segment_filename(self):
+        """
+        Returns the FFmpeg strftime filename pattern of the segmented .mp4 files `name_norm_HH-MM-SS_DD-MM-YYYY.mp4`.
+        The segment start time (instead of HHi-HHf) is used, so that files are not overwritten if FFmpeg is restarted within the hour.
+        """
+        return f"{self.camera_name_norm.replace('%', '%%')}_%H-%M-%S_%d-%m-%Y.mp4"
+
+    def _ffmpeg_output_args(self):
+        """
+        Returns the FFmpeg output arguments for the segment muxer: a new .mp4 file at every local clock hour.
+        """
+        return [
+            '-f', 'segment', # segment muxer
+            '-segment_format', 'mp4',
+            '-segment_time', '3600', # 1 hour segments
+            '-segment_atclocktime', '1', # split at wall clock hours
+            '-strftime', '1', # expand filename time pattern
+            '-reset_timestamps', '1', # each segment starts at timestamp 0
+            self._current_file_path
+        ]
@@ -1,10 +1,13 @@
 import cv2
 import threading
-import time
 import socket
 from flask import Flask, Response
 from logger_setup import logger
 
+# Multipart response frame part header and trailer
+FRAME_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+FRAME_PART_TRAILER = b'\r\n'
+
 class StreamServer:
     """
     Stream Module Class.
@@ -27,16 +30,49 @@ class StreamServer:
             daemon=True
         )
 
-        # Latest frame control variables
-        self._latest_frame_lock = threading.Lock()
+        # Latest frame control variables (no lock, attribute reference swaps are atomic)
         self._latest_frame = None
+        self._latest_chunk = None # (frame, multipart chunk) of latest frame, built once on first client read
+
+        # Clients wait for new frames on this condition (woken by `write`), frames are counted to detect new ones
+        self._frame_cv = threading.Condition()
+        self._frame_seq = 0
+        self.client_count = 0 # Connected clients (updated under `_frame_cv`), frames are not encoded while 0 if nothing else needs them
     
     def write(self, frame: bytes):
         """
-        Updates latest frame.
+        Updates latest frame (1-slot, reference swap only). Accepts any bytes-like object (bytes, memoryview).
+        Older frames not yet sent to clients are overwritten, so slow clients never build up a backlog.
+        Wakes up the waiting clients.
+        """
+        self._latest_frame = frame
+        with self._frame_cv:
+            self._frame_seq += 1
+            self._frame_cv.notify_all()
+
+    def clear(self):
+        """
+        Drops the latest frame, so a client connecting later never gets a stale frame (e.g. after frames stopped being encoded).
+        """
+        self._latest_frame = None
+        self._latest_chunk = None
+
+    def _get_latest_chunk(self):
+        """
+        Returns the multipart response chunk of the latest frame (None if there is no frame yet).
+        The chunk is built once per frame and shared by all clients, so the frame is copied once regardless of the number of clients,
+        and never if there are no clients.
+        The chunk is cached with its frame, so a chunk is never served for a newer frame (without a lock shared with `write`).
         """
-        with self._latest_frame_lock:
-            self._latest_frame = frame
+        frame = self._latest_frame
+        if frame is None:
+            return None
+        cached = self._latest_chunk
+        if cached is not None and cached[0] is frame:
+            return cached[1]
+        chunk = b''.join((FRAME_PART_HEADER, frame, FRAME_PART_TRAILER)) # Single allocation and copy of the frame
+        self._latest_chunk = (frame, chunk)
+        return chunk
 
     def start(self):
         """
@@ -54,22 +90,29 @@ class StreamServer:
         def generate():
             """
             Called for each client.
+            Waits for each new frame (the frame rate is paced by the camera, at target fps), stale frames are never re-sent.
+            Frames written while the client is sending are skipped, so slow clients only get the latest one.
+            Counts the client while connected (decremented when the client disconnects and the generator is closed).
             """
-            frame_interval = 1.0 / self.target_fps
-            while True:
-                start = time.time()
-                with self._latest_frame_lock:
-                    jpeg_bytes = self._latest_frame
-                if jpeg_bytes is None:
+            frame_cv = self._frame_cv
+            last_seq = 0 # last frame number sent to this client
+            with frame_cv:
+                self.client_count += 1
+            try:
+                while True:
+                    with frame_cv:
+                        if not frame_cv.wait_for(lambda: self._frame_seq != last_seq, timeout=1.0):
+                            continue
+                        last_seq = self._frame_seq
+                    chunk = self._get_latest_chunk()
+                    if chunk is None:
                         continue
 
-                # Return frame as part of a multipart response
-                yield (
-                    b'--frame\r\n'
-                    b'Content-Type: image/jpeg\r\n\r\n' +
-                    jpeg_bytes + b'\r\n'
-                )
-                time.sleep(max(0, frame_interval - (time.time() - start)))
+                    # Return frame as part of a multipart response
+                    yield chunk
+            finally:
+                with frame_cv:
+                    self.client_count -= 1
 
         @app.route('/')
         def video_feed():
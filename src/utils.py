@@ -1,18 +1,22 @@
 import os
 import time
+import struct
+import cv2
 from logger_setup import logger
 
 def check_create_directory(directory: str):
     """
     Check if the directory exists, if not, create it.
+    Tries to create it directly (no existence check before), an existing directory is reported by FileExistsError.
     """
-    if not os.path.exists(directory):
-        try:
-            os.makedirs(directory)
-            logger.info(f'Directory {os.path.abspath(directory)} created.')
-        except OSError as e:
-            logger.error(f"Error creating directory {os.path.abspath(directory)}: {e}")
-            raise(f"Error creating directory {os.path.abspath(directory)}: {e}")
+    try:
+        os.makedirs(directory)
+        logger.info(f'Directory {os.path.abspath(directory)} created.')
+    except FileExistsError:
+        pass
+    except OSError as e:
+        logger.error(f"Error creating directory {os.path.abspath(directory)}: {e}")
+        raise
 
 def convert_time_to_datetime(time_float: float):
     """
@@ -20,8 +24,47 @@ def convert_time_to_datetime(time_float: float):
     - date string: `DD-MM-YYYY`
     - time string: `HH:MM:SS.MS`
     """
-    local_time = time.localtime(time_float)
+    lt = time.localtime(time_float)
     millis = int((time_float - int(time_float)) * 1000)
-    date_str = time.strftime("%d-%m-%Y", local_time)
-    time_str = time.strftime(f"%H:%M:%S.{millis:03d}", local_time)
-    return date_str, time_str
\ No newline at end of file
+    date_str = f"{lt.tm_mday:02d}-{lt.tm_mon:02d}-{lt.tm_year}"
+    time_str = f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}.{millis:03d}"
+    return date_str, time_str
+
+def fourcc_to_str(fourcc: float):
+    """
+    Converts a FOURCC code (as returned by `cv2.VideoCapture.get(cv2.CAP_PROP_FOURCC)`) to its 4-character string.
+    """
+    return struct.pack('<I', int(fourcc) & 0xFFFFFFFF).decode('ascii', 'replace')
+
+def is_gstreamer_pipeline(camera: str):
+    """
+    Returns True if camera source is a GStreamer pipeline string (ending in an `appsink` element).
+    """
+    return isinstance(camera, str) and '!' in camera and 'appsink' in camera.rsplit('!', 1)[-1]
+
+def is_network_stream(camera: str):
+    """
+    Returns True if camera source is a network stream URL (`rtsp://`, `http(s)://`).
+    """
+    return isinstance(camera, str) and camera.startswith(('rtsp://', 'http://', 'https://'))
+
+def open_video_capture(camera: str):
+    """
+    Opens a `cv2.VideoCapture` with the most direct backend for the camera source:
+    - GStreamer pipelines (ending in `appsink`, e.g. `... ! appsink max-buffers=1 drop=true sync=false`): GStreamer backend.
+    - V4L2 devices (`/dev/video*`, int index on Linux): V4L2 backend (mmap buffers, no GStreamer conversion pipeline).
+    - Network streams (`rtsp://`, `http(s)://`): FFmpeg backend with a 1 frame buffer, so `grab()` always returns the newest frame.
+    - Others: OpenCV default backend.
+    """
+    if is_gstreamer_pipeline(camera):
+        return cv2.VideoCapture(camera, cv2.CAP_GSTREAMER)
+    if is_network_stream(camera):
+        cap = cv2.VideoCapture(camera, cv2.CAP_FFMPEG)
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+    if os.name == 'posix' and (isinstance(camera, int) or camera.startswith('/dev/video')):
+        cap = cv2.VideoCapture(camera, cv2.CAP_V4L2)
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(camera)